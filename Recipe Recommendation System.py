@@ -1,322 +1,275 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import pickle
-import json
-import os
-from sklearn.metrics.pairwise import cosine_similarity
-import requests
-from bs4 import BeautifulSoup
-
-# Persistent storage file
-SELECTED_RECIPES_FILE = "selected_recipes.json"
+import numpy as np
+import re
+import uuid
+import artifacts
+from model_loader import ModelArtifacts
+from nutrition import knapsack_select
+from posters import fetch_posters
+from recipe_store import as_list
+from ranking import blend_scores, subset_scores, top_k_indices
+from result_cache import ResultCache, make_key
+from selection_store import get_selection_store
+from substitutions import HEALTH_CONDITIONS
+
+# Number of best-matching recipes handed to the knapsack selector
+HEALTHY_CANDIDATE_POOL = 1000
+
+# Ranked recipes kept per cached query
+RESULT_CACHE_DEPTH = 100
+
+# Recipes rendered per page of a result list; "Load more" appends the next page
+RESULTS_PAGE_SIZE = 10
+
+# Whole `tags_cleaned` tags deciding a recommendation's category, checked in this order (default Main Dish)
+CATEGORY_TAGS = {
+    "Main Dish": ["main-dish", "main course"],
+    "Side Dish": ["side-dish", "side course"],
+    "Desserts": ["desserts", "cake", "pastry"],
+}
 
 # Ensure session state is initialized properly
 if "view_selected" not in st.session_state:
     st.session_state.view_selected = False  # Default to showing recommendations
 
+def current_user_id():
+    """Logged-in user's email, else an anonymous id kept in the page URL (`?user=`)."""
+    if getattr(st.user, "is_logged_in", False):
+        return st.user.email
+    if "user" not in st.query_params:
+        st.query_params["user"] = uuid.uuid4().hex
+    return st.query_params["user"]
+
+
+# Selected recipe ids (dict as an ordered set) and the ids last written to the store
 if "selected_recipes" not in st.session_state:
-    st.session_state.selected_recipes = {}
+    stored_ids = get_selection_store().get(current_user_id())
+    st.session_state.selected_recipes = dict.fromkeys(stored_ids)
+    st.session_state.persisted_selection = set(stored_ids)
 
-# Load selected recipes from JSON at start
-def load_selected_recipes():
-    if os.path.exists(SELECTED_RECIPES_FILE):
-        with open(SELECTED_RECIPES_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-# Save selected recipes to JSON
-def save_selected_recipes():
-    with open(SELECTED_RECIPES_FILE, "w") as f:
-        json.dump(st.session_state.selected_recipes, f, indent=4)
-
-# Load previously selected recipes into session state
-st.session_state.selected_recipes = load_selected_recipes()
-
-
-def fetch_poster(recipe_name, recipe_id):
-    url = f"https://www.food.com/recipe/{recipe_name}-{recipe_id}"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            return None
-        soup = BeautifulSoup(response.content, 'html.parser')
-        div_tag = soup.find('div', {'class': 'primary-image svelte-wgcq7z'})
-        if div_tag:
-            img_tag = div_tag.find('img')
-            if img_tag and 'srcset' in img_tag.attrs:
-                return img_tag['srcset'].split(' ')[0]
-            elif img_tag and 'src' in img_tag.attrs:
-                return img_tag['src']
-    except:
-        return None
-    return None
-
-
-@st.cache_data
-def load_recipes():
-    return pd.read_csv('preprocessed_recipes.csv')
-
-
-@st.cache_resource
-def load_vectorizer():
-    with open('vectorizer.pkl', 'rb') as f:
-        return pickle.load(f)
-
-
-@st.cache_resource
-def load_tfidf_matrix():
-    with open('tfidf_matrix.pkl', 'rb') as f:
-        return pickle.load(f)
-
-
-def load_models_and_data():
-    recipes = load_recipes()
-    vectorizer = load_vectorizer()
-    tfidf_matrix = load_tfidf_matrix()
-    return recipes, vectorizer, tfidf_matrix
-
-
-def recommend_recipes(preferences, included, excluded, additional_prefs, recipes, vectorizer, tfidf_matrix):
-    filtered_recipes = recipes.copy()
-
-    for pref in preferences:
-        filtered_recipes = filtered_recipes[filtered_recipes['tags_cleaned'].str.contains(pref, case=False, na=False)]
-
-    for ing in included:
-        filtered_recipes = filtered_recipes[filtered_recipes['ingredients'].str.contains(ing, case=False, na=False)]
-
-    for ing in excluded:
-        filtered_recipes = filtered_recipes[~filtered_recipes['ingredients'].apply(lambda x: ing.lower() in str(x).lower())]
-
-    if filtered_recipes.empty:
-        return pd.DataFrame()
-
-    filtered_indices = filtered_recipes.index
-    filtered_tfidf_matrix = tfidf_matrix[filtered_indices]
-
-    user_query = " ".join(preferences + included + [additional_prefs])
-    user_vector = vectorizer.transform([user_query])
-
-    similarity_scores = cosine_similarity(user_vector, filtered_tfidf_matrix).flatten()
-    sorted_indices = similarity_scores.argsort()[::-1]
-
-    return filtered_recipes.iloc[sorted_indices]
-
-
-def substitute_ingredients(ingredients, health_conditions):
-    """Provides alternative ingredients based on health conditions."""
-    substitutions = {
-        "sugar": "honey",
-        "white sugar": "honey",
-        "brown sugar": "honey",
-        "butter": "olive oil",
-        "margarine": "avocado oil",
-        "salt": "herbs or potassium salt",
-        "flour": "almond flour",
-        "white flour": "whole wheat flour",
-        "pasta": "zucchini noodles",
-        "rice": "quinoa",
-        "bread": "whole grain bread",
-        "cheese": "low-fat cheese",
-        "milk": "almond milk",
-        "cream": "coconut cream",
-        "mayonnaise": "greek yogurt",
-        "sour cream": "cottage cheese",
-        "red meat": "lean chicken or fish",
-        "fried food": "grilled alternative",
-    }
-
-    if "Diabetes" in health_conditions:
-        diabetes_subs = {
-            "sugar": "stevia",
-            "white sugar": "stevia",
-            "brown sugar": "stevia",
-            "honey": "monk fruit sweetener",
-            "white bread": "whole grain bread",
-            "pasta": "chickpea pasta",
-            "rice": "cauliflower rice"
-        }
-        substitutions.update(diabetes_subs)
-
-    if "Heart Condition" in health_conditions:
-        heart_subs = {
-            "butter": "olive oil",
-            "margarine": "avocado oil",
-            "salt": "herbs or potassium salt",
-            "fried food": "baked or grilled food"
-        }
-        substitutions.update(heart_subs)
-
-    return [substitutions.get(ing.lower(), ing) for ing in ingredients]
 
+def toggle_selection(recipe_id):
+    """Checkbox callback; only the session changes here, main() persists the rerun's changes once."""
+    if st.session_state[f"recipe_{recipe_id}"]:
+        st.session_state.selected_recipes.setdefault(recipe_id)
+    else:
+        st.session_state.selected_recipes.pop(recipe_id, None)
 
-def show_recipes(recommendations, health_conditions):
-    """Display recommended recipes categorized into Main Dish, Side Dish, and Desserts."""
-    if recommendations.empty:
-        st.warning("🚨 No recipes match your preferences. Try adjusting your filters!")
-        return  # Stop execution if no recipes are found
 
-    # Categorizing recipes based on `tags_cleaned`
-    categories = {
-        "Main Dish": [],
-        "Side Dish": [],
-        "Desserts": []
-    }
-
-    for _, row in recommendations.iterrows():
-        # Convert 'tags_cleaned' into a list safely
-        tags = str(row['tags_cleaned']).lower().split()  # Convert to lowercase and split into individual tags
-
-        if any(tag in tags for tag in ["main-dish", "main course"]):
-            categories["Main Dish"].append(row)
-        elif any(tag in tags for tag in ["side-dish", "side course"]):
-            categories["Side Dish"].append(row)
-        elif any(tag in tags for tag in ["desserts", "cake", "pastry"]):
-            categories["Desserts"].append(row)
-        else:
-            categories["Main Dish"].append(row)  # Default to Main Dish
+def persist_selections():
+    """Write this rerun's selection changes to the store in one transaction."""
+    selected, persisted = set(st.session_state.selected_recipes), st.session_state.persisted_selection
+    if selected != persisted:
+        added = [recipe_id for recipe_id in st.session_state.selected_recipes if recipe_id not in persisted]
+        get_selection_store().apply(current_user_id(), added=added, removed=persisted - selected)
+        st.session_state.persisted_selection = selected
 
-    # Function to display recipes in each category
-    def display_recipes(category_name, recipes, icon):
-        if not recipes:  # Show message if no recipes are available in the category
-            st.info(f"⚠️ No {category_name.lower()} recipes found.")
-            return
 
-        # **📝 Bigger Font Size for Categories with Icons**
-        st.markdown(
-            f'<h1 style="font-size:30px; text-align:left;">{icon} {category_name}</h1><hr>',
-            unsafe_allow_html=True
-        )
-        for index, row in enumerate(recipes):
-            recipe_name = row['name']
-            recipe_id = row['id']
-            poster_url = fetch_poster(recipe_name, recipe_id)
-
-            # Unique Checkbox Key (Avoid Duplicate Keys)
-            unique_key = f"recipe_{category_name}_{index}"
-
-            selected = st.checkbox(
-                f"✅ {recipe_name}",
-                key=unique_key,
-                value=recipe_name in st.session_state.selected_recipes
-            )
-
-            if selected:
-                st.session_state.selected_recipes[recipe_name] = row.to_dict()
-            else:
-                st.session_state.selected_recipes.pop(recipe_name, None)
+class RecommendationService(ModelArtifacts):
+    """Everything the app ranks with, loaded once per artifact version and shared by all sessions.
 
-            save_selected_recipes()  # Save selections
+    `recommend` memoizes ranked row ids per canonical query, so reruns that repeat a
+    query (or only page through it) skip filtering and scoring entirely.
+    """
 
-            # Display recipe details
-            st.markdown(f"### 🍽️ **{recipe_name.upper()}**")
+    def __init__(self, version=None):
+        super().__init__(version)
+        self.result_cache = ResultCache()
+        # Precompute every recipe's substitutions for the common health-condition sets
+        self.recipe_substitutions()
 
-            if poster_url:
-                st.image(poster_url, caption=recipe_name, use_container_width=True)
-            else:
-                st.image("https://via.placeholder.com/500", caption="Image not available", use_container_width=True)
+    def rank(self, preferences, included, excluded, additional_prefs, top_k=None, offset=0):
+        """Row positions of the best matching recipes, best first."""
+        # Row ids from the inverted index are positions in both `recipes` and `tfidf_matrix`
+        filtered_indices = self.recipe_index.filter(tags=preferences, included=included, excluded=excluded)
+        if len(filtered_indices) == 0:
+            return filtered_indices
 
-            # Ingredients
-            original_ingredients = eval(row['ingredients'])
-            modified_ingredients = substitute_ingredients(original_ingredients, health_conditions)
+        user_query = " ".join(preferences + included + [additional_prefs])
+        user_vector = self.query_encoder.transform([user_query])
 
-            st.markdown("### 🥕 Ingredients:")
-            for original, modified in zip(original_ingredients, modified_ingredients):
-                if original.lower() != modified.lower():
-                    st.markdown(
-                        f"- **{original}** → <span style='color: green;'>✔️ {modified}</span>", 
-                        unsafe_allow_html=True
-                    )
-                else:
-                    st.markdown(f"- {original}")
+        similarity_scores = subset_scores(user_vector, self.tfidf_matrix, filtered_indices, self.tfidf_columns)
+        scores = blend_scores(similarity_scores, self.ranking_prior, filtered_indices)
+        return filtered_indices[top_k_indices(scores, top_k, offset)]
 
-            # Steps (Added Section)
-            steps = eval(row['steps'])
-            st.markdown("### 📝 Steps:")
-            for step_index, step in enumerate(steps, start=1):
-                st.markdown(f"{step_index}. {step}")
+    def recommend(self, preferences=(), included=(), excluded=(), additional_prefs="", top_k=10, offset=0):
+        """Recommended recipes for canonicalized inputs, reusing the ranking of earlier identical queries."""
+        query = make_key(preferences, included, excluded, additional_prefs)
+        # Deeper queries (e.g. the healthy candidate pool) are memoized separately at their own depth
+        depth = max(RESULT_CACHE_DEPTH, offset + top_k)
+        key = (depth,) + query
+        row_ids = self.result_cache.get(key)
+        if row_ids is None:
+            row_ids = self.rank(list(query[0]), list(query[1]), list(query[2]), query[3], top_k=depth)
+            self.result_cache.put(key, row_ids)
+        return self.recipes.iloc[row_ids[offset:offset + top_k]]
 
-            st.markdown("---")
+    def recipes_by_id(self, recipe_ids):
+        """Rows of `recipe_ids` in the given order; ids no longer in the catalog are skipped."""
+        positions = self.recipe_positions.get_indexer(list(recipe_ids))
+        return self.recipes.iloc[positions[positions >= 0]]
 
 
-    # Display categorized recipes with icons
-    display_recipes("Main Dish", categories["Main Dish"], "🍛")
-    display_recipes("Side Dish", categories["Side Dish"], "🥗")
-    display_recipes("Desserts", categories["Desserts"], "🍰")
+@st.cache_resource(max_entries=1)
+def get_recommendation_service(version):
+    return RecommendationService(version)
 
 
-def show_selected_recipes():
+def recommendation_service():
+    """The shared service for the published artifact version; a newly published version is loaded on the next rerun."""
+    return get_recommendation_service(artifacts.current_version())
 
-    if not st.session_state.selected_recipes:
-        st.warning("You haven't selected any recipes yet!")
-        return
 
-    for row in st.session_state.selected_recipes.values():
-        recipe_name = row['name']
-        st.markdown(f"## 🍽️ **{recipe_name.upper()}**")
+def categorize(recommendations):
+    """Category name of each recommended recipe, matched on its whitespace-separated tags."""
+    tags = " " + recommendations['tags_cleaned'].astype(str).str.lower().str.replace(r"\s+", " ", regex=True) + " "
+    matches = [
+        tags.str.contains("|".join(f" {re.escape(tag)} " for tag in category_tags)).to_numpy()
+        for category_tags in CATEGORY_TAGS.values()
+    ]
+    return np.select(matches, list(CATEGORY_TAGS), default="Main Dish")
 
-        # Display recipe details
-        poster_url = fetch_poster(recipe_name, row['id'])
-        if poster_url:
-            st.image(poster_url, caption=recipe_name, use_container_width=True)
-        else:
-            st.image("https://via.placeholder.com/500", caption="Image not available", use_container_width=True)
 
-        # Ingredients
-        st.markdown("### 🥕 Ingredients:")
-        st.markdown("\n".join([f"- {ing}" for ing in eval(row['ingredients'])]))
+def new_results(view, results):
+    """Keep a view's latest results across reruns, paging again from the start."""
+    st.session_state[f"{view}_results"] = results
+    st.session_state.shown = {name: shown for name, shown in st.session_state.get("shown", {}).items() if not name.startswith(view)}
 
-        # Steps
-        steps = eval(row['steps'])
-        st.markdown("### 📝 Steps:")
-        for i, step in enumerate(steps, 1):
-            st.markdown(f"{i}. {step}")
 
-        st.markdown("---")
+def show_more(name):
+    st.session_state.shown[name] = st.session_state.shown.get(name, RESULTS_PAGE_SIZE) + RESULTS_PAGE_SIZE
 
 
-def parse_nutrition(nutrition_str):
-    """Parse nutrition data into exactly 7 values (handles missing/excess)."""
-    try:
-        values = json.loads(nutrition_str.replace("'", "\""))  # Convert single quotes to double for JSON
-        if isinstance(values, list):
-            return (values + [0] * 7)[:7]  # Ensure exactly 7 values
-    except:
-        pass
-    return [0, 0, 0, 0, 0, 0, 0]  # Default if parsing fails
+@st.fragment
+def show_paginated(name, items, render_page, *args):
+    """Render the first pages of `items` with `render_page`; "Load more" reruns only this fragment."""
+    st.session_state.setdefault("shown", {})
+    shown = st.session_state.shown.get(name, RESULTS_PAGE_SIZE)
+    render_page(items[:shown], *args)
+    if shown < len(items):
+        st.button(f"Load more ({len(items) - shown} more)", key=f"more_{name}", on_click=show_more, args=(name,))
+    # Checkbox reruns of this fragment skip the end of main()
+    persist_selections()
 
 
-def knapsack_select_recipes(recipes, max_calories=500, max_fat=15, max_sodium=10, min_protein=5, max_recipes=10):
-    """
-    Uses a greedy Knapsack approach to select recipes that optimize nutritional balance.
-    Prioritizes high protein, low fat, low sugar, and moderate calories.
+@st.cache_data(max_entries=1000)
+def page_details_markdown(recipe_ids, health_conditions=None):
+    """Ingredients (with substitutes for `health_conditions`, if given) and steps of a page of recipes, one markdown block each.
+
+    The page's substitutions come from one batch lookup in the service's precomputed tables.
     """
-    selected_recipes = []
-    remaining_calories = max_calories
+    service = recommendation_service()
+    positions = service.recipe_positions.get_indexer(list(recipe_ids))
+    rows = service.recipes.iloc[positions]
+    ingredient_lists = [as_list(value) for value in rows['ingredients']]
+    if health_conditions is None:
+        substituted = ingredient_lists
+    else:
+        substituted = service.recipe_substitutions().substitute_page(positions, ingredient_lists, health_conditions)
+    blocks = []
+    for ingredients, modified_ingredients, steps in zip(ingredient_lists, substituted, rows['steps']):
+        lines = ["### 🥕 Ingredients:"]
+        for original, modified in zip(ingredients, modified_ingredients):
+            if original.lower() != modified.lower():
+                lines.append(f"- **{original}** → <span style='color: green;'>✔️ {modified}</span>")
+            else:
+                lines.append(f"- {original}")
+        lines.append("\n### 📝 Steps:")
+        lines += [f"{i}. {step}" for i, step in enumerate(as_list(steps), 1)]
+        blocks.append("\n".join(lines))
+    return blocks
+
+
+def show_poster(poster_url, recipe_name):
+    if poster_url:
+        st.image(poster_url, caption=recipe_name, use_container_width=True)
+    else:
+        st.image("https://via.placeholder.com/500", caption="Image not available", use_container_width=True)
+
+
+def render_recommendation_page(rows, health_conditions):
+    poster_urls = fetch_posters(list(zip(rows['name'], rows['id'])))
+    details = page_details_markdown(tuple(int(recipe_id) for recipe_id in rows['id']), health_conditions)
+    for recipe_name, recipe_id, poster_url, recipe_details in zip(rows['name'], rows['id'], poster_urls, details):
+        recipe_id = int(recipe_id)
+        st.checkbox(
+            f"✅ {recipe_name}",
+            key=f"recipe_{recipe_id}",
+            value=recipe_id in st.session_state.selected_recipes,
+            on_change=toggle_selection,
+            args=(recipe_id,)
+        )
 
-    # Extract nutrition info safely
-    recipes["nutrition_values"] = recipes["nutrition"].apply(parse_nutrition)
+        # Display recipe details
+        st.markdown(f"### 🍽️ **{recipe_name.upper()}**")
+        show_poster(poster_url, recipe_name)
+        st.markdown(recipe_details, unsafe_allow_html=True)
+        st.markdown("---")
 
-    # Calculate protein-to-calories ratio (avoid div by zero)
-    recipes["protein_to_calories"] = recipes["nutrition_values"].apply(lambda x: x[4] / (x[0] + 1))  
 
-    # Sort recipes based on protein-to-calories ratio (higher = better)
-    sorted_recipes = recipes.sort_values(by="protein_to_calories", ascending=False)
+def show_recipes(recommendations, health_conditions, view="preferences"):
+    """Display recommended recipes categorized into Main Dish, Side Dish, and Desserts."""
+    if recommendations.empty:
+        st.warning("🚨 No recipes match your preferences. Try adjusting your filters!")
+        return  # Stop execution if no recipes are found
 
-    for _, row in sorted_recipes.iterrows():
-        nutrition = row["nutrition_values"]
-        calories, fat, sugar, sodium, protein, saturated_fat, fiber = nutrition
+    categories = categorize(recommendations)
+    health_conditions = tuple(health_conditions)
+    for category_name, icon in [("Main Dish", "🍛"), ("Side Dish", "🥗"), ("Desserts", "🍰")]:
+        category_recipes = recommendations[categories == category_name]
+        if category_recipes.empty:  # Show message if no recipes are available in the category
+            st.info(f"⚠️ No {category_name.lower()} recipes found.")
+            continue
+
+        # **📝 Bigger Font Size for Categories with Icons**
+        st.markdown(
+            f'<h1 style="font-size:30px; text-align:left;">{icon} {category_name}</h1><hr>',
+            unsafe_allow_html=True
+        )
+        show_paginated(f"{view}_{category_name}", category_recipes, render_recommendation_page, health_conditions)
+
+
+def render_plain_page(rows):
+    poster_urls = fetch_posters(list(zip(rows['name'], rows['id'])))
+    details = page_details_markdown(tuple(int(recipe_id) for recipe_id in rows['id']))
+    for recipe_name, poster_url, recipe_details in zip(rows['name'], poster_urls, details):
+        st.markdown(f"## 🍽️ {recipe_name}")
+        show_poster(poster_url, recipe_name)
+        st.markdown(recipe_details)
+        st.markdown("---")
+
+
+def show_selected_recipes():
+
+    if not st.session_state.selected_recipes:
+        st.warning("You haven't selected any recipes yet!")
+        return
+
+    # Hydrate the stored ids from the recipe store
+    selected_rows = recommendation_service().recipes_by_id(st.session_state.selected_recipes)
+    show_paginated("selected", selected_rows, render_plain_page)
 
-        # **Check constraints**
-        if calories <= remaining_calories and fat <= max_fat and sodium <= max_sodium and protein >= min_protein:
-            selected_recipes.append(row.to_dict())
-            remaining_calories -= calories
 
-        # **Break conditions**
-        if remaining_calories <= 0 or len(selected_recipes) >= max_recipes:
-            break  # Stop if calorie limit is reached or max recipes are selected
+def knapsack_select_recipes(recipes, max_calories=500, max_fat=15, max_sodium=10, min_protein=5, max_recipes=10):
+    """
+    Uses a bounded Knapsack (exact DP over the best candidates) to select recipes that optimize nutritional balance.
+    Maximizes total protein within the calorie budget, among recipes meeting the fat, sodium and protein limits.
+    """
+    if recipes.empty:
+        return []
 
+    # Nutrition rows of the candidates, parsed once at load time; look rows up by id, not by index label
+    service = recommendation_service()
+    nutrition = service.nutrition[service.recipe_positions.get_indexer(recipes['id'])]
+    chosen = knapsack_select(nutrition, max_calories, max_fat, max_sodium, min_protein, max_recipes)
+
+    selected_recipes = []
+    for position in chosen:
+        row = recipes.iloc[position].to_dict()
+        row["nutrition_values"] = nutrition[position].astype(float).round(1).tolist()
+        selected_recipes.append(row)
     return selected_recipes
 
 
@@ -333,7 +286,7 @@ def show_healthy_recipes():
     included = [ing.strip() for ing in st.sidebar.text_input("Ingredients to Include (comma-separated)").split(',') if ing.strip()]
     excluded = [ing.strip() for ing in st.sidebar.text_input("Ingredients to Exclude (comma-separated)").split(',') if ing.strip()]
     additional_prefs = st.sidebar.text_area("Additional Preferences (optional)").strip()
-    health_conditions = st.sidebar.multiselect("Health Conditions", ["Diabetes", "Heart Condition"])
+    health_conditions = st.sidebar.multiselect("Health Conditions", HEALTH_CONDITIONS)
 
     # **Collect User Preferences**
     preferences = [diet, cuisine] + taste + included
@@ -342,107 +295,70 @@ def show_healthy_recipes():
     # **Button to Search Healthy Recipes**
     if st.sidebar.button("🔍 Find Healthy Recipes"):
 
-        # **Load Recipes**
-        recipes, vectorizer, tfidf_matrix = load_models_and_data()
-
         # **Filter Recipes Based on User Preferences**
-        filtered_recipes = recommend_recipes(preferences, included, excluded, additional_prefs, recipes, vectorizer, tfidf_matrix)
+        filtered_recipes = recommendation_service().recommend(preferences, included, excluded, additional_prefs, top_k=HEALTHY_CANDIDATE_POOL)
 
         # **Run Knapsack Selection for Balanced Nutrition**
-        healthy_recipes = knapsack_select_recipes(filtered_recipes)
-
-        if not healthy_recipes:
-            st.warning("⚠️ No healthy recipes found based on your preferences. Try adjusting filters!")
-            return
-
-        # **Display Healthy Recipes**
-        for row in healthy_recipes:
-            recipe_name = row['name']
-            recipe_id = row['id']
-            poster_url = fetch_poster(recipe_name, recipe_id)
+        new_results("healthy", knapsack_select_recipes(filtered_recipes))
 
-            st.markdown(f"## 🥗 {recipe_name}")
+    healthy_recipes = st.session_state.get("healthy_results")
+    if healthy_recipes is None:
+        return
+    if not healthy_recipes:
+        st.warning("⚠️ No healthy recipes found based on your preferences. Try adjusting filters!")
+        return
 
-            if poster_url:
-                st.image(poster_url, caption=recipe_name, use_container_width=True)
-            else:
-                st.image("https://via.placeholder.com/500", caption="Image not available", use_container_width=True)
-
-            # **Show Nutrition Breakdown**
-            nutrition = row["nutrition_values"]
-            calories, fat, sugar, sodium, protein, saturated_fat, fiber = nutrition  
-
-            st.markdown("### 🍎 Nutritional Information:")
-            st.markdown(f"- **Calories:** {calories} kcal")
-            st.markdown(f"- **Protein:** {protein} g  ✅ *Boosts muscle & metabolism*")
-            st.markdown(f"- **Fiber:** {fiber} g  ✅ *Good for digestion*")
-            st.markdown(f"- **Total Fat:** {fat} g")
-            st.markdown(f"- **Saturated Fat:** {saturated_fat} g")
-            st.markdown(f"- **Sugar:** {sugar} g ⚠️ *Lower is better*")
-            st.markdown(f"- **Sodium:** {sodium} mg ⚠️ *Avoid excess sodium*")
-
-            # **Show Ingredients with Healthier Substitutes**
-            original_ingredients = eval(row['ingredients'])
-            modified_ingredients = substitute_ingredients(original_ingredients, health_conditions)
-
-            st.markdown("### 🥕 Ingredients:")
-            for original, modified in zip(original_ingredients, modified_ingredients):
-                if original.lower() != modified.lower():
-                    st.markdown(
-                        f"- **{original}** → <span style='color: green;'>✔️ {modified}</span>", 
-                        unsafe_allow_html=True
-                    )
-                else:
-                    st.markdown(f"- {original}")
-
-            # **Show Steps**
-            steps = eval(row['steps'])
-            st.markdown("### 📝 Steps:")
-            for i, step in enumerate(steps, 1):
-                st.markdown(f"{i}. {step}")
-
-            st.markdown("---")
-
-def show_ingredient_based_recipes(recipes, vectorizer, tfidf_matrix):
+    # **Display Healthy Recipes**
+    show_paginated("healthy", healthy_recipes, render_healthy_page, tuple(health_conditions))
 
-    """Displays recipes based on user-inputted ingredients."""
-    st.sidebar.header("Find Recipes by Ingredients")
-    input_ingredients = [ing.strip() for ing in st.sidebar.text_input("Enter Ingredients (comma-separated)").split(',') if ing.strip()]
 
-    if st.sidebar.button("🔍 Search Recipes"):
-        recommendations = recommend_recipes([], input_ingredients, [], "", recipes, vectorizer, tfidf_matrix)
+def render_healthy_page(healthy_recipes, health_conditions):
+    poster_urls = fetch_posters([(row['name'], row['id']) for row in healthy_recipes])
+    details = page_details_markdown(tuple(int(row['id']) for row in healthy_recipes), health_conditions)
+    for row, poster_url, recipe_details in zip(healthy_recipes, poster_urls, details):
+        recipe_name = row['name']
 
-        st.subheader("🍲 Recipes Based on Your Ingredients")
+        st.markdown(f"## 🥗 {recipe_name}")
+        show_poster(poster_url, recipe_name)
 
-        if not recommendations.empty:  # ✅ FIXED: Removed () from `.empty`
-            for index, row in recommendations.iterrows():
-                recipe_name = row['name']
-                recipe_id = row['id']
-                poster_url = fetch_poster(recipe_name, recipe_id)
+        # **Show Nutrition Breakdown**
+        nutrition = row["nutrition_values"]
+        calories, fat, sugar, sodium, protein, saturated_fat, fiber = nutrition
 
-                st.markdown(f"## 🍽️ {recipe_name}")
+        st.markdown(
+            "### 🍎 Nutritional Information:\n"
+            f"- **Calories:** {calories} kcal\n"
+            f"- **Protein:** {protein} g  ✅ *Boosts muscle & metabolism*\n"
+            f"- **Fiber:** {fiber} g  ✅ *Good for digestion*\n"
+            f"- **Total Fat:** {fat} g\n"
+            f"- **Saturated Fat:** {saturated_fat} g\n"
+            f"- **Sugar:** {sugar} g ⚠️ *Lower is better*\n"
+            f"- **Sodium:** {sodium} mg ⚠️ *Avoid excess sodium*"
+        )
 
-                if poster_url:
-                    st.image(poster_url, caption=recipe_name, use_container_width=True)
-                else:
-                    st.image("https://via.placeholder.com/500", caption="Image not available", use_container_width=True)
+        # **Show Ingredients with Healthier Substitutes, and Steps**
+        st.markdown(recipe_details, unsafe_allow_html=True)
+        st.markdown("---")
 
-                # **Show Ingredients**
-                original_ingredients = eval(row['ingredients'])
-                st.markdown("### 🥕 Ingredients:")
-                st.markdown("\n".join([f"- {ing}" for ing in original_ingredients]))
+def show_ingredient_based_recipes():
 
-                # **Show Steps**
-                steps = eval(row['steps'])
-                st.markdown("### 📝 Steps:")
-                for i, step in enumerate(steps, 1):
-                    st.markdown(f"{i}. {step}")
+    """Displays recipes based on user-inputted ingredients."""
+    st.sidebar.header("Find Recipes by Ingredients")
+    input_ingredients = [ing.strip() for ing in st.sidebar.text_input("Enter Ingredients (comma-separated)").split(',') if ing.strip()]
+    top_k = st.sidebar.slider("Number of Recipes", 5, 50, 10)
 
-                st.markdown("---")
+    if st.sidebar.button("🔍 Search Recipes"):
+        new_results("ingredients", recommendation_service().recommend(included=input_ingredients, top_k=top_k))
 
-        else:
-            st.warning("⚠️ No recipes found! Try adding different ingredients.")
+    recommendations = st.session_state.get("ingredients_results")
+    if recommendations is None:
+        return
 
+    st.subheader("🍲 Recipes Based on Your Ingredients")
+    if not recommendations.empty:
+        show_paginated("ingredients", recommendations, render_plain_page)
+    else:
+        st.warning("⚠️ No recipes found! Try adding different ingredients.")
 
 
 def main():
@@ -451,9 +367,7 @@ def main():
     # Navigation tabs
     tab = st.radio("Navigation", ["Preferences-Based Recipes", "Healthy Recipes", "Ingredient-Based Recipes", "Selected Recipe List"], horizontal=True)
 
-    # Initialize variables
-    recommendations = pd.DataFrame()  # Default empty DataFrame
-    recipes, vectorizer, tfidf_matrix = load_models_and_data()  # Load models
+    service = recommendation_service()  # Loaded once per process and artifact version
 
     if tab == "Preferences-Based Recipes":
         # Standard sidebar for Preferences-Based Filtering
@@ -464,15 +378,17 @@ def main():
         included = [ing.strip() for ing in st.sidebar.text_input("Ingredients to Include (comma-separated)").split(',') if ing.strip()]
         excluded = [ing.strip() for ing in st.sidebar.text_input("Ingredients to Exclude (comma-separated)").split(',') if ing.strip()]
         additional_prefs = st.sidebar.text_area("Additional Preferences (optional)").strip()
-        health_conditions = st.sidebar.multiselect("Health Conditions", ["Diabetes", "Heart Condition"])
+        health_conditions = st.sidebar.multiselect("Health Conditions", HEALTH_CONDITIONS)
+        top_k = st.sidebar.slider("Number of Recipes", 5, 50, 10)
 
         preferences = [diet, cuisine] + taste + included
         preferences = [p for p in preferences if p != "Any"]
 
         if st.sidebar.button("Recommend Recipes"):
-            recommendations = recommend_recipes(preferences, included, excluded, additional_prefs, recipes, vectorizer, tfidf_matrix)
+            new_results("preferences", service.recommend(preferences, included, excluded, additional_prefs, top_k=top_k))
 
         st.subheader("🎯 Recommended Recipes Based on Your Preferences")
+        recommendations = st.session_state.get("preferences_results", pd.DataFrame())
         if not recommendations.empty:
             show_recipes(recommendations, health_conditions)
         else:
@@ -483,8 +399,12 @@ def main():
         show_healthy_recipes()  # Function to display healthy recipes
 
     elif tab == "Ingredient-Based Recipes":
-        recipes, vectorizer, tfidf_matrix = load_models_and_data()
-        show_ingredient_based_recipes(recipes, vectorizer, tfidf_matrix)
+        show_ingredient_based_recipes()
+
+    elif tab == "Selected Recipe List":
+        show_selected_recipes()
+
+    persist_selections()
 
         
 
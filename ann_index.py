@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from artifacts import ARTIFACTS_DIR, resolve_artifacts_dir
+from ranking import blend_scores
+
+ANN_NPROBE = int(os.environ.get("ANN_NPROBE", "16"))
+# Dense candidates re-ranked with exact TF-IDF cosine, per requested result
+ANN_RERANK_FACTOR = 10
+ANN_MIN_CANDIDATES = 200
+# With a ranking prior, rows with a lower cosine can still make the blended top-K, so
+# both the probed lists and the candidate pool are this many times wider
+ANN_PRIOR_WIDEN = int(os.environ.get("ANN_PRIOR_WIDEN", "4"))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return (matrix / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+def _kmeans(points, n_clusters, iterations=20, seed=0):
+    """Plain Lloyd's k-means on unit vectors (spherical: centroids are re-normalized)."""
+    rng = np.random.default_rng(seed)
+    centroids = points[rng.choice(len(points), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(points @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        empty = np.bincount(assignment, minlength=n_clusters) == 0
+        # Re-seed empty clusters with random points so every list stays usable
+        sums[empty] = points[rng.choice(len(points), int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file ANN index over L2-normalized SVD embeddings of the TF-IDF rows.
+
+    Each row is assigned to its nearest k-means centroid. A search scores only the
+    rows in the `nprobe` lists closest to the query.
+    """
+
+    def __init__(self, components, embeddings, centroids, list_offsets, list_rows):
+        self.components = components
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+
+    @classmethod
+    def build(cls, tfidf_matrix, svd, n_lists=None, train_size=50000, block_size=65536, seed=0):
+        embeddings = _normalize(svd.transform(tfidf_matrix))
+        n = len(embeddings)
+        n_lists = n_lists or max(1, min(int(4 * np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+        sample = embeddings[rng.choice(n, min(train_size, n), replace=False)]
+        centroids = _kmeans(sample, min(n_lists, len(sample)), seed=seed)
+
+        assignment = np.empty(n, dtype=np.int32)
+        for start in range(0, n, block_size):
+            assignment[start:start + block_size] = np.argmax(embeddings[start:start + block_size] @ centroids.T, axis=1)
+        list_rows = np.argsort(assignment, kind='stable').astype(np.int32)
+        list_offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=list_offsets[1:])
+        return cls(svd.components_.astype(np.float32), embeddings, centroids, list_offsets, list_rows)
+
+    def extend(self, new_tfidf_rows):
+        """New index with `new_tfidf_rows` appended after the existing rows.
+
+        New rows are projected with the saved SVD and added to their nearest
+        existing list; centroids are only re-trained by a full rebuild.
+        """
+        new_embeddings = _normalize(np.asarray(new_tfidf_rows @ self.components.T))
+        n_lists = len(self.centroids)
+        assignment = np.repeat(np.arange(n_lists, dtype=np.int32), np.diff(self.list_offsets))
+        old_assignment = np.empty(len(self.embeddings), dtype=np.int32)
+        old_assignment[self.list_rows] = assignment
+        assignment = np.concatenate([old_assignment, np.argmax(new_embeddings @ self.centroids.T, axis=1).astype(np.int32)])
+        list_rows = np.argsort(assignment, kind='stable').astype(np.int32)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=n_lists), out=list_offsets[1:])
+        embeddings = np.concatenate([self.embeddings, new_embeddings])
+        return IVFIndex(np.asarray(self.components), embeddings, np.asarray(self.centroids), list_offsets, list_rows)
+
+    def save(self, directory=ARTIFACTS_DIR):
+        directory = resolve_artifacts_dir(directory)
+        os.makedirs(directory, exist_ok=True)
+        for name in ('components', 'embeddings', 'centroids', 'list_offsets', 'list_rows'):
+            np.save(os.path.join(directory, f'ann_{name}.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory=ARTIFACTS_DIR):
+        """Memory-mapped index, or None when it has not been built."""
+        directory = resolve_artifacts_dir(directory)
+        if not os.path.exists(os.path.join(directory, 'ann_centroids.npy')):
+            return None
+        return cls(*[
+            np.load(os.path.join(directory, f'ann_{name}.npy'), mmap_mode='r')
+            for name in ('components', 'embeddings', 'centroids', 'list_offsets', 'list_rows')
+        ])
+
+    def project(self, query_vector):
+        """SVD embedding of a (1, vocabulary) TF-IDF query vector."""
+        return _normalize(np.asarray(query_vector @ self.components.T).ravel())
+
+    def search(self, query_vector, n_candidates, nprobe=ANN_NPROBE):
+        """Approximate top-`n_candidates` row ids for the query, best first by embedding cosine."""
+        query = self.project(query_vector)
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists])
+        scores = self.embeddings[rows] @ query
+        if len(rows) > n_candidates:
+            best = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+            rows, scores = rows[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        return rows[order]
+
+
+def exact_cosine(query_vector, tfidf_matrix, row_ids):
+    """Exact TF-IDF cosine of the query against `row_ids` (rows are L2-normalized)."""
+    return np.asarray((tfidf_matrix[row_ids] @ query_vector.T).todense()).ravel()
+
+
+def ann_rank(query_vector, tfidf_matrix, ann_index, allowed_rows, needed, nprobe=ANN_NPROBE, prior=None):
+    """Row ids of the best `needed` allowed rows by ANN retrieval plus exact re-ranking.
+
+    `allowed_rows` is the sorted row-id array of the query's filter. Candidates are
+    re-ranked by exact cosine blended with `prior` (see `ranking.blend_scores`), as
+    on the exact path; with a prior, ANN_PRIOR_WIDEN times more lists and candidates
+    are searched. `needed` should be the requested page's end (offset + top_k).
+    Returns None when too few candidates survive the filter, so the caller can fall
+    back to the exact path.
+    """
+    n_candidates = max(needed * ANN_RERANK_FACTOR, ANN_MIN_CANDIDATES)
+    if prior is not None:
+        n_candidates *= ANN_PRIOR_WIDEN
+        nprobe *= ANN_PRIOR_WIDEN
+    candidates = ann_index.search(query_vector, n_candidates, nprobe)
+    candidates = candidates[np.isin(candidates, allowed_rows, assume_unique=True)]
+    if len(candidates) < min(needed, len(allowed_rows)):
+        return None
+    scores = blend_scores(exact_cosine(query_vector, tfidf_matrix, candidates), prior, candidates)
+    order = np.argsort(-scores, kind='stable')
+    return candidates[order]
+
+
+def _top_k_overlap(exact_top, ranked, k):
+    return 0 if ranked is None else len(exact_top & set(ranked[:k].tolist()))
+
+
+def recall_report(vectorizer, tfidf_matrix, ann_index, queries, k=10, nprobes=(1, 4, 8, 16, 32, 64), prior=None):
+    """Recall@k of ANN retrieval against exact scoring, with mean per-query latency, for each nprobe.
+
+    With a ranking `prior`, each entry also reports `blended_recall`: the overlap of
+    the ANN top-k with the exact top-k when both blend in the prior, as the API ranks.
+    """
+    query_matrix = vectorizer.transform(queries)
+    all_rows = np.arange(tfidf_matrix.shape[0])
+    exact_top, blended_top, exact_ms = [], [], []
+    for i in range(len(queries)):
+        started = time.perf_counter()
+        scores = np.asarray((tfidf_matrix @ query_matrix[i].T).todense()).ravel()
+        exact_top.append(set(np.argpartition(-scores, k - 1)[:k].tolist()))
+        exact_ms.append((time.perf_counter() - started) * 1000)
+        if prior is not None:
+            blended = blend_scores(scores, prior, all_rows)
+            blended_top.append(set(np.argpartition(-blended, k - 1)[:k].tolist()))
+    report = {'k': k, 'queries': len(queries), 'rows': tfidf_matrix.shape[0],
+              'exact_ms': float(np.mean(exact_ms)), 'ann': []}
+    for nprobe in nprobes:
+        hits, latencies = 0, []
+        for i in range(len(queries)):
+            started = time.perf_counter()
+            ranked = ann_rank(query_matrix[i], tfidf_matrix, ann_index, all_rows, k, nprobe)
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += _top_k_overlap(exact_top[i], ranked, k)
+        entry = {'nprobe': nprobe, 'recall': hits / (k * len(queries)), 'mean_ms': float(np.mean(latencies))}
+        if prior is not None:
+            hits, latencies = 0, []
+            for i in range(len(queries)):
+                started = time.perf_counter()
+                ranked = ann_rank(query_matrix[i], tfidf_matrix, ann_index, all_rows, k, nprobe, prior)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += _top_k_overlap(blended_top[i], ranked, k)
+            entry.update({'blended_recall': hits / (k * len(queries)), 'blended_mean_ms': float(np.mean(latencies))})
+        report['ann'].append(entry)
+    return report
+
+
+if __name__ == '__main__':
+    from sklearn.decomposition import TruncatedSVD
+
+    from artifacts import load_artifacts
+    from interactions import load_interaction_features
+    from ranking import feature_prior, recipe_features
+
+    parser = argparse.ArgumentParser(description="Build the IVF ANN index and report recall@K vs latency against exact scoring.")
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR)
+    parser.add_argument('--components', type=int, default=20)
+    parser.add_argument('--lists', type=int, default=None, help="Number of inverted lists (default 4*sqrt(n))")
+    parser.add_argument('--report-queries', type=int, default=200, help="Recipes whose tags are used as report queries (0 to skip)")
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    recipes, vectorizer, tfidf_matrix = load_artifacts(args.artifacts)
+    svd = TruncatedSVD(n_components=args.components).fit(tfidf_matrix)
+    ann_index = IVFIndex.build(tfidf_matrix, svd, args.lists)
+    ann_index.save(args.artifacts)
+    print(f"Wrote IVF index with {len(ann_index.centroids)} lists to {args.artifacts}/")
+
+    if args.report_queries:
+        sample = recipes['tags_cleaned'].sample(min(args.report_queries, len(recipes)), random_state=0)
+        queries = [" ".join(tags.split()[:3]) for tags in sample.fillna("")]
+        prior = feature_prior(recipe_features(recipes, load_interaction_features()))
+        print(json.dumps(recall_report(vectorizer, tfidf_matrix, IVFIndex.load(args.artifacts), queries, args.k, prior=prior), indent=4))
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from nutrition import nutrition_matrix, save_nutrition
+from recipe_index import InvertedIndex
+from recipe_store import load_recipe_store, save_recipe_store
+
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", "artifacts")
+# Name of the file in ARTIFACTS_DIR holding the active version under versions/
+CURRENT_FILE = 'CURRENT'
+
+# Plain-value TfidfVectorizer settings that survive a JSON round trip
+VECTORIZER_PARAMS = [
+    'lowercase', 'strip_accents', 'stop_words', 'token_pattern', 'ngram_range', 'analyzer',
+    'max_df', 'min_df', 'max_features', 'binary', 'norm', 'use_idf', 'smooth_idf', 'sublinear_tf',
+]
+
+
+def current_version(root=ARTIFACTS_DIR):
+    """Name of the published version, or None for a flat (unversioned) artifact directory."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_artifacts_dir(directory=ARTIFACTS_DIR):
+    """The directory holding the artifacts: the published version of a versioned root, else `directory` itself."""
+    version = current_version(directory)
+    return os.path.join(directory, 'versions', version) if version else directory
+
+
+def create_version(root=ARTIFACTS_DIR):
+    """Create and return a new, unpublished version directory under `root`/versions."""
+    name = time.strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+    path = os.path.join(root, 'versions', name)
+    os.makedirs(path)
+    return path
+
+
+def publish_version(path, root=ARTIFACTS_DIR, keep=3):
+    """Atomically make `path` the current version and prune older versions, keeping `keep` including it.
+
+    Only versions that sort before `path` are pruned: a newer directory may belong to a
+    build that is still writing it.
+    """
+    temp_file = os.path.join(root, CURRENT_FILE + '.tmp')
+    with open(temp_file, 'w') as f:
+        f.write(os.path.basename(path) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, os.path.join(root, CURRENT_FILE))
+    # Running workers may still map an older version; keep a few around until they reload
+    versions_dir = os.path.join(root, 'versions')
+    older = sorted(name for name in os.listdir(versions_dir) if name < os.path.basename(path))
+    for name in older[:max(len(older) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def save_tfidf(vectorizer, tfidf_matrix, directory=ARTIFACTS_DIR):
+    """Write the TF-IDF matrix, vocabulary, idf weights and meta.json (see `save_artifacts`)."""
+    os.makedirs(directory, exist_ok=True)
+    tfidf_matrix = sparse.csr_matrix(tfidf_matrix)
+    tfidf_matrix.sort_indices()
+    np.save(os.path.join(directory, 'tfidf_data.npy'), tfidf_matrix.data.astype(np.float32))
+    # scipy wants indices and indptr in one dtype; anything else forces a copy on load
+    index_dtype = np.int32 if tfidf_matrix.nnz < np.iinfo(np.int32).max else np.int64
+    np.save(os.path.join(directory, 'tfidf_indices.npy'), tfidf_matrix.indices.astype(index_dtype))
+    np.save(os.path.join(directory, 'tfidf_indptr.npy'), tfidf_matrix.indptr.astype(index_dtype))
+    # Column-major copy: scoring a query reads only the columns of its terms
+    tfidf_columns = tfidf_matrix.tocsc()
+    tfidf_columns.sort_indices()
+    np.save(os.path.join(directory, 'tfidf_csc_data.npy'), tfidf_columns.data.astype(np.float32))
+    np.save(os.path.join(directory, 'tfidf_csc_indices.npy'), tfidf_columns.indices.astype(index_dtype))
+    np.save(os.path.join(directory, 'tfidf_csc_indptr.npy'), tfidf_columns.indptr.astype(index_dtype))
+
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, column in vectorizer.vocabulary_.items():
+        terms[column] = term
+    with open(os.path.join(directory, 'vocabulary.txt'), 'w', encoding='utf-8') as f:
+        f.write("\n".join(terms) + "\n")
+    np.save(os.path.join(directory, 'idf.npy'), vectorizer.idf_.astype(np.float64))
+
+    params = vectorizer.get_params()
+    meta = {
+        'shape': list(tfidf_matrix.shape),
+        'vectorizer': {name: params[name] for name in VECTORIZER_PARAMS},
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=4)
+
+
+def save_artifacts(recipes, vectorizer, tfidf_matrix, directory=ARTIFACTS_DIR):
+    """Write the model as mmap-able arrays plus columnar recipe metadata.
+
+    Layout:
+        tfidf_{data,indices,indptr}.npy  CSR arrays of the TF-IDF matrix
+        tfidf_csc_*.npy                  the same matrix as CSC arrays
+        idf.npy                          vectorizer idf weights, by column
+        vocabulary.txt                   one term per line, line number == column
+        meta.json                        matrix shape and vectorizer settings
+        nutrition.npy                    (n, 7) float32 parsed nutrition values
+        recipes.parquet                  recipe metadata (see recipe_store)
+        index_{tags,ingredients}*        filter postings (see recipe_index)
+    """
+    save_tfidf(vectorizer, tfidf_matrix, directory)
+    save_nutrition(nutrition_matrix(recipes['nutrition']), directory)
+    save_recipe_store(recipes, os.path.join(directory, 'recipes.parquet'))
+    InvertedIndex.from_recipes(recipes).save(directory)
+
+
+def load_tfidf_matrix(directory=ARTIFACTS_DIR, meta=None):
+    """CSR matrix whose arrays are read-only memory maps shared through the OS page cache."""
+    directory = resolve_artifacts_dir(directory)
+    if meta is None:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    arrays = [
+        np.load(os.path.join(directory, f'tfidf_{name}.npy'), mmap_mode='r')
+        for name in ('data', 'indices', 'indptr')
+    ]
+    return sparse.csr_matrix(tuple(arrays), shape=tuple(meta['shape']), copy=False)
+
+
+def load_tfidf_columns(directory=ARTIFACTS_DIR, meta=None):
+    """Memory-mapped CSC view of the TF-IDF matrix, or None when the artifacts predate it."""
+    directory = resolve_artifacts_dir(directory)
+    if not os.path.exists(os.path.join(directory, 'tfidf_csc_data.npy')):
+        return None
+    if meta is None:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    arrays = [
+        np.load(os.path.join(directory, f'tfidf_csc_{name}.npy'), mmap_mode='r')
+        for name in ('data', 'indices', 'indptr')
+    ]
+    return sparse.csc_matrix(tuple(arrays), shape=tuple(meta['shape']), copy=False)
+
+
+def load_vectorizer(directory=ARTIFACTS_DIR, meta=None):
+    """Rebuild a fitted TfidfVectorizer from vocabulary.txt and idf.npy."""
+    directory = resolve_artifacts_dir(directory)
+    if meta is None:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+    params = dict(meta['vectorizer'])
+    params['ngram_range'] = tuple(params['ngram_range'])
+    vectorizer = TfidfVectorizer(**params)
+    with open(os.path.join(directory, 'vocabulary.txt'), encoding='utf-8') as f:
+        terms = f.read().split("\n")[:-1]
+    vectorizer.vocabulary_ = {term: column for column, term in enumerate(terms)}
+    vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+    return vectorizer
+
+
+def load_artifacts(directory=ARTIFACTS_DIR):
+    """Load (recipes, vectorizer, tfidf_matrix) from an artifact directory."""
+    directory = resolve_artifacts_dir(directory)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    recipes = load_recipe_store(os.path.join(directory, 'recipes.parquet'))
+    return recipes, load_vectorizer(directory, meta), load_tfidf_matrix(directory, meta)
+
+
+def has_artifacts(directory=ARTIFACTS_DIR):
+    return os.path.exists(os.path.join(resolve_artifacts_dir(directory), 'meta.json'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Convert the notebook's pickles and CSV into the mmap-able artifact directory."
+    )
+    parser.add_argument('--recipes', default='preprocessed_recipes.csv')
+    parser.add_argument('--vectorizer', default='vectorizer.pkl')
+    parser.add_argument('--tfidf-matrix', default='tfidf_matrix.pkl')
+    parser.add_argument('--out', default=ARTIFACTS_DIR)
+    args = parser.parse_args()
+
+    recipes = load_recipe_store(path=os.path.splitext(args.recipes)[0] + '.parquet', csv_path=args.recipes)
+    with open(args.vectorizer, 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open(args.tfidf_matrix, 'rb') as f:
+        tfidf_matrix = pickle.load(f)
+    version_dir = create_version(args.out)
+    save_artifacts(recipes, vectorizer, tfidf_matrix, version_dir)
+    publish_version(version_dir, args.out)
+    print(f"Published {tfidf_matrix.shape[0]} recipes x {tfidf_matrix.shape[1]} terms as {version_dir}/")
@@ -0,0 +1,325 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Generated corpora, one artifact root per size
+BENCHMARK_DIR = 'benchmark_data'
+# Replayable request log; the same format can be recorded from real traffic
+REQUEST_LOG = os.path.join(BENCHMARK_DIR, 'requests.jsonl')
+
+TAGS = [
+    'vegetarian', 'vegan', 'italian', 'mexican', 'indian', 'chinese', 'thai', 'french', 'greek', 'spicy',
+    'sweet', 'savory', 'healthy', 'low-fat', 'low-sodium', 'low-carb', 'gluten-free', 'dairy-free',
+    'breakfast', 'brunch', 'lunch', 'dinner-party', 'main-dish', 'side-dishes', 'desserts', 'salads',
+    'soups-stews', 'sandwiches', 'appetizers', 'beverages', 'easy', 'kid-friendly', 'holiday-event',
+    '15-minutes-or-less', '30-minutes-or-less', '60-minutes-or-less', 'oven', 'stove-top', 'grilling', 'slow-cooker',
+]
+INGREDIENTS = [
+    'salt', 'butter', 'sugar', 'onion', 'water', 'eggs', 'olive oil', 'flour', 'milk', 'garlic', 'pepper',
+    'brown sugar', 'garlic cloves', 'all-purpose flour', 'baking powder', 'egg', 'salt and pepper', 'parmesan cheese',
+    'lemon juice', 'baking soda', 'vegetable oil', 'vanilla', 'black pepper', 'cinnamon', 'tomatoes', 'sour cream',
+    'honey', 'cream cheese', 'unsalted butter', 'chicken broth', 'onions', 'carrots', 'celery', 'potatoes',
+    'chicken breasts', 'ground beef', 'rice', 'pasta', 'spinach', 'mushrooms', 'basil', 'oregano', 'cumin',
+    'chili powder', 'paprika', 'ginger', 'soy sauce', 'lime juice', 'cilantro', 'jalapeno', 'avocado', 'beans',
+    'corn', 'cheddar cheese', 'mozzarella cheese', 'heavy cream', 'yogurt', 'coconut milk', 'tofu', 'shrimp',
+    'salmon', 'bacon', 'zucchini', 'broccoli', 'bell pepper', 'green onions', 'parsley', 'thyme', 'rosemary',
+    'walnuts', 'almonds', 'raisins', 'oats', 'bananas', 'apples', 'strawberries', 'chocolate chips', 'cocoa', 'maple syrup',
+]
+WORDS = [
+    'a', 'quick', 'family', 'favorite', 'recipe', 'that', 'is', 'great', 'for', 'weeknights', 'and', 'parties',
+    'my', 'mom', 'used', 'to', 'make', 'this', 'delicious', 'simple', 'hearty', 'light', 'fresh', 'classic',
+    'comforting', 'crowd', 'pleaser', 'with', 'the', 'best', 'flavor', 'summer', 'winter', 'ever', 'tasty',
+]
+
+
+def _zipf_weights(n, exponent=1.1):
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def synthetic_recipes(n_rows, seed=0):
+    """Recipes frame shaped like the notebook's output, with Zipf-distributed tags and ingredients."""
+    rng = np.random.default_rng(seed)
+    tag_draws = rng.choice(len(TAGS), size=(n_rows, 8), p=_zipf_weights(len(TAGS), 0.8))
+    tag_counts = rng.integers(3, 9, n_rows)
+    ingredient_draws = rng.choice(len(INGREDIENTS), size=(n_rows, 12), p=_zipf_weights(len(INGREDIENTS)))
+    ingredient_counts = rng.integers(3, 13, n_rows)
+    word_draws = rng.choice(len(WORDS), size=(n_rows, 10))
+
+    tags = [list(dict.fromkeys(TAGS[t] for t in row[:k])) for row, k in zip(tag_draws, tag_counts)]
+    ingredients = [list(dict.fromkeys(INGREDIENTS[i] for i in row[:k])) for row, k in zip(ingredient_draws, ingredient_counts)]
+    nutrition = np.column_stack([
+        rng.gamma(2.0, 200.0, n_rows),   # calories
+        rng.gamma(1.5, 15.0, n_rows),    # fat (% daily value, like the rest)
+        rng.gamma(1.2, 30.0, n_rows),    # sugar
+        rng.gamma(1.2, 15.0, n_rows),    # sodium
+        rng.gamma(1.5, 20.0, n_rows),    # protein
+        rng.gamma(1.5, 20.0, n_rows),    # saturated fat
+        rng.gamma(1.2, 8.0, n_rows),     # fiber
+    ]).round(1)
+
+    recipes = pd.DataFrame({
+        'name': [f"recipe {i} {tag[0]}" for i, tag in enumerate(tags)],
+        'id': np.arange(n_rows, dtype=np.int64) + 100000,
+        'minutes': rng.integers(5, 240, n_rows),
+        'tags': tags,
+        'nutrition': nutrition.tolist(),
+        'steps': [["combine the ingredients", "cook until done"]] * n_rows,
+        'description': [" ".join(WORDS[w] for w in row) for row in word_draws],
+        'ingredients': ingredients,
+        'n_ingredients': [len(value) for value in ingredients],
+    })
+    recipes['tags_cleaned'] = [" ".join(value) for value in tags]
+    recipes['text_data'] = recipes['tags_cleaned'] + " " + recipes['description'] + " " + [" ".join(value) for value in ingredients]
+    return recipes
+
+
+def build_corpus(n_rows, root, seed=0):
+    """Fit the notebook's vectorizer on a synthetic corpus and publish it as an artifact version under `root`."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from artifacts import create_version, publish_version, save_artifacts
+
+    recipes = synthetic_recipes(n_rows, seed)
+    vectorizer = TfidfVectorizer(stop_words='english')
+    tfidf_matrix = vectorizer.fit_transform(recipes['text_data'])
+    os.makedirs(root, exist_ok=True)
+    version_dir = create_version(root)
+    save_artifacts(recipes, vectorizer, tfidf_matrix, version_dir)
+    publish_version(version_dir, root, keep=1)
+
+
+def generate_request_log(path, n_requests=2000, seed=0):
+    """Write a replayable log of API requests: single queries (some paged) and small batches."""
+    rng = np.random.default_rng(seed)
+    p = _zipf_weights(len(TAGS), 0.8)
+
+    def query():
+        tags = rng.choice(TAGS, size=rng.integers(1, 4), replace=False, p=p)
+        body = {'preference': tags[0]}
+        if len(tags) > 1:
+            body['Cuisine'] = tags[1]
+        if len(tags) > 2:
+            body['taste'] = tags[2]
+        return body
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        for _ in range(n_requests):
+            if rng.random() < 0.1:
+                entry = {'method': 'POST', 'path': '/recommend/batch',
+                         'json': {'queries': [query() for _ in range(10)], 'top_k': 10}}
+            else:
+                body = query()
+                body['top_k'] = 10
+                body['offset'] = int(rng.choice([0, 0, 0, 10, 20]))
+                entry = {'method': 'POST', 'path': '/recommend', 'json': body}
+            f.write(json.dumps(entry) + "\n")
+
+
+def load_request_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean/max in milliseconds of a list of per-call durations in seconds."""
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if len(ms) == 0:
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'count': len(ms), 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3),
+            'mean_ms': round(float(ms.mean()), 3), 'max_ms': round(float(ms.max()), 3)}
+
+
+def rss_mb():
+    """Current and peak resident set size of this process in MB (current is None off Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open('/proc/self/status') as f:
+            current = next(int(line.split()[1]) / 1024 for line in f if line.startswith('VmRSS:'))
+    except OSError:
+        current = None
+    return {'current_mb': None if current is None else round(current, 1), 'peak_mb': round(peak, 1)}
+
+
+def _time_calls(function, arguments, min_calls):
+    durations = []
+    while len(durations) < min_calls:
+        for argument in arguments:
+            started = time.perf_counter()
+            function(argument)
+            durations.append(time.perf_counter() - started)
+    return latency_summary(durations)
+
+
+def microbenchmarks(flask_api, request_log, min_calls=200):
+    """Per-call latency of the core scoring functions for the single queries of the log."""
+    from nutrition import knapsack_select
+
+    model = flask_api.model
+    queries = [flask_api.parse_preferences(entry['json']) for entry in request_log if entry['path'] == '/recommend']
+    queries = queries[:min_calls]
+    results = {
+        'filter_recipes_by_preferences': _time_calls(
+            lambda preferences: flask_api.filter_recipes_by_preferences(preferences, model.recipe_index),
+            queries, min_calls),
+        'recommend_recipes': _time_calls(
+            lambda preferences: flask_api.recommend_recipes(
+                preferences, model.recipes, model.query_encoder, model.tfidf_matrix, model.recipe_index,
+                flask_api.DEFAULT_TOP_K, 0, model.tfidf_columns, model.ranking_prior),
+            queries, min_calls),
+    }
+    # The Streamlit healthy tab runs the knapsack over its best 1000 matches
+    pools = []
+    for preferences in queries:
+        candidates = flask_api.recommend_recipes(
+            preferences, model.recipes, model.query_encoder, model.tfidf_matrix, model.recipe_index, 1000, 0, model.tfidf_columns, model.ranking_prior)
+        if not candidates.empty:
+            pools.append(np.asarray(model.nutrition)[model.recipe_positions.get_indexer(candidates['id'])])
+    results['knapsack_select'] = _time_calls(knapsack_select, pools, min_calls) if pools else {'count': 0}
+    return results
+
+
+def start_stub_poster_server(responses=None):
+    """Local stand-in for the recipe pages, so load tests never reach food.com.
+
+    Every recipe page has a poster, except the ids in `responses`, which map to a
+    (status, body) pair to serve instead.
+    """
+    import http.server
+
+    responses = responses or {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            recipe_id = self.path.rsplit('-', 1)[-1]
+            status, body = responses.get(int(recipe_id) if recipe_id.isdigit() else recipe_id, (200, None))
+            if body is None:
+                body = f'<div class="primary-image svelte-wgcq7z"><img src="http://posters.invalid/{recipe_id}.jpg"></div>'
+            body = body.encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_test(url, request_log, concurrency=8, duration=None):
+    """Replay `request_log` against `url` from `concurrency` threads; with `duration` the log is
+    looped for that many seconds. Returns latency, throughput and status counts."""
+    import requests
+
+    lock = threading.Lock()
+    durations, statuses = [], {}
+    deadline = None if duration is None else time.monotonic() + duration
+
+    def worker(worker_id):
+        session = requests.Session()
+        position = worker_id
+        while True:
+            if deadline is None and position >= len(request_log):
+                return
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            entry = request_log[position % len(request_log)]
+            position += concurrency
+            started = time.perf_counter()
+            response = session.request(entry['method'], url + entry['path'], json=entry.get('json'))
+            elapsed = time.perf_counter() - started
+            with lock:
+                durations.append(elapsed)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - started
+    return {'concurrency': concurrency, 'seconds': round(wall, 3),
+            'throughput_rps': round(len(durations) / wall, 1), 'statuses': statuses,
+            'latency': latency_summary(durations)}
+
+
+def serve_in_background(app):
+    from werkzeug.serving import make_server
+
+    # Per-request access logs would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the scoring functions and load-test the API on a synthetic corpus.")
+    parser.add_argument('--rows', type=int, default=10000, help="Synthetic corpus size (e.g. 10000 to 1000000)")
+    parser.add_argument('--rebuild', action='store_true', help="Regenerate the corpus even if it exists")
+    parser.add_argument('--requests', default=REQUEST_LOG, help="Request log to replay (generated when missing)")
+    parser.add_argument('--log-size', type=int, default=2000)
+    parser.add_argument('--calls', type=int, default=200, help="Minimum calls per microbenchmark")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=None, help="Loop the request log for this many seconds")
+    parser.add_argument('--url', default=None, help="Load-test a running API instead of an in-process server")
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('--out', default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    # The app reads these at import time, so they are set before anything from the repo is imported
+    root = os.path.join(BENCHMARK_DIR, f'rows-{args.rows}')
+    os.environ['ARTIFACTS_DIR'] = root
+    os.environ['POSTER_CACHE_PATH'] = os.path.join(BENCHMARK_DIR, 'poster_cache.sqlite3')
+    poster_server = start_stub_poster_server()
+    os.environ['POSTER_BASE_URL'] = f"http://127.0.0.1:{poster_server.server_port}/recipe"
+
+    results = {'python': sys.version.split()[0], 'platform': platform.platform(), 'rows': args.rows}
+    if args.rebuild or not os.path.exists(os.path.join(root, 'CURRENT')):
+        started = time.perf_counter()
+        build_corpus(args.rows, root)
+        results['corpus_build_seconds'] = round(time.perf_counter() - started, 3)
+    if not os.path.exists(args.requests):
+        generate_request_log(args.requests, args.log_size)
+    request_log = load_request_log(args.requests)
+
+    started = time.perf_counter()
+    import flask_api
+    results['model_load_seconds'] = round(time.perf_counter() - started, 3)
+    results['rss_after_load'] = rss_mb()
+
+    results['micro'] = microbenchmarks(flask_api, request_log, args.calls)
+    for name, summary in results['micro'].items():
+        print(f"{name:<32} p50 {summary.get('p50_ms', 0):9.3f} ms   p95 {summary.get('p95_ms', 0):9.3f} ms   p99 {summary.get('p99_ms', 0):9.3f} ms")
+
+    if not args.skip_load:
+        server = None
+        url = args.url
+        if url is None:
+            server, url = serve_in_background(flask_api.app)
+        results['load'] = load_test(url, request_log, args.concurrency, args.duration)
+        if server is not None:
+            server.shutdown()
+        load = results['load']
+        print(f"load test: {load['throughput_rps']} req/s, p50 {load['latency']['p50_ms']} ms, "
+              f"p95 {load['latency']['p95_ms']} ms, p99 {load['latency']['p99_ms']} ms, statuses {load['statuses']}")
+    results['rss_end'] = rss_mb()
+    print(f"RSS: {results['rss_end']}")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=4)
+    poster_server.shutdown()
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import resource
+import shutil
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from artifacts import ARTIFACTS_DIR, create_version, publish_version, save_tfidf
+from ingest import RECIPE_COLUMNS, prepare_recipes
+from nutrition import nutrition_matrix, save_nutrition
+from recipe_index import InvertedIndex
+
+# Raw CSV rows parsed per task; a chunk and its parsed copy are what one worker holds
+CHUNK_SIZE = 20000
+
+_vectorizer = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its largest finished child, in MB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+class StageTimer:
+    """Records wall time and peak RSS at the end of each build stage."""
+
+    def __init__(self):
+        self.stages = []
+
+    def stage(self, name, started):
+        own, children = peak_rss_mb()
+        self.stages.append({'stage': name, 'seconds': round(time.perf_counter() - started, 3),
+                            'peak_rss_mb': round(own, 1), 'peak_worker_rss_mb': round(children, 1)})
+        print(f"{name:<12} {self.stages[-1]['seconds']:>9.2f}s   peak RSS {own:>8.1f} MB (workers {children:.1f} MB)")
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    return pd.read_csv(path, usecols=RECIPE_COLUMNS, chunksize=chunk_size)
+
+
+def _bounded_map(pool, function, iterable, in_flight):
+    """`pool.map` that reads at most `in_flight` items ahead, so the input is streamed."""
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(function, item))
+        if len(pending) >= in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _init_worker(vectorizer):
+    global _vectorizer
+    _vectorizer = vectorizer
+
+
+def _count_chunk(chunk):
+    """Pass 1: number of documents and document frequency of every term in the chunk."""
+    analyzer = _vectorizer.build_analyzer()
+    document_frequency = Counter()
+    for text in prepare_recipes(chunk)['text_data']:
+        document_frequency.update(set(analyzer(text)))
+    return len(chunk), document_frequency
+
+
+def _transform_chunk(chunk):
+    """Pass 2: parsed recipe metadata and TF-IDF rows of the chunk."""
+    recipes = prepare_recipes(chunk)
+    return recipes, _vectorizer.transform(recipes['text_data'])
+
+
+def fit_vocabulary(path, vectorizer, chunk_size=CHUNK_SIZE, workers=None):
+    """Set `vocabulary_` and `idf_` on an unfitted TfidfVectorizer from one streamed pass.
+
+    Gives the same vocabulary and idf weights as `fit` on the whole corpus (for the
+    default min_df/max_df/max_features, which the notebook uses).
+    """
+    n_documents, document_frequency = 0, Counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(vectorizer,)) as pool:
+        for count, chunk_frequency in _bounded_map(pool, _count_chunk, read_chunks(path, chunk_size), 2 * (workers or os.cpu_count())):
+            n_documents += count
+            document_frequency.update(chunk_frequency)
+
+    terms = sorted(document_frequency)
+    vectorizer.vocabulary_ = {term: column for column, term in enumerate(terms)}
+    df = np.array([document_frequency[term] for term in terms], dtype=np.float64)
+    if vectorizer.smooth_idf:
+        vectorizer.idf_ = np.log((1 + n_documents) / (1 + df)) + 1
+    else:
+        vectorizer.idf_ = np.log(n_documents / df) + 1
+    return vectorizer
+
+
+def transform_corpus(path, vectorizer, directory, chunk_size=CHUNK_SIZE, workers=None):
+    """Stream the corpus through the fitted vectorizer; writes recipes.parquet chunk by
+    chunk and returns the (TF-IDF matrix, nutrition matrix)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows, nutrition, writer = [], [], None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(vectorizer,)) as pool:
+            for recipes, tfidf_rows in _bounded_map(pool, _transform_chunk, read_chunks(path, chunk_size), 2 * (workers or os.cpu_count())):
+                if writer is None:
+                    table = pa.Table.from_pandas(recipes, preserve_index=False)
+                    writer = pq.ParquetWriter(os.path.join(directory, 'recipes.parquet'), table.schema)
+                else:
+                    table = pa.Table.from_pandas(recipes, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                rows.append(tfidf_rows)
+                nutrition.append(nutrition_matrix(recipes['nutrition']))
+    finally:
+        if writer is not None:
+            writer.close()
+    return sparse.vstack(rows, format='csr'), np.concatenate(nutrition)
+
+
+def build(path, root=ARTIFACTS_DIR, chunk_size=CHUNK_SIZE, workers=None, keep=3):
+    """Build and publish a new artifact version from a RAW_recipes.csv-format file.
+
+    Returns (version directory, per-stage report).
+    """
+    timer = StageTimer()
+    vectorizer = TfidfVectorizer(stop_words='english')
+    version_dir = create_version(root)
+    try:
+        started = time.perf_counter()
+        fit_vocabulary(path, vectorizer, chunk_size, workers)
+        timer.stage('vocabulary', started)
+
+        started = time.perf_counter()
+        tfidf_matrix, nutrition = transform_corpus(path, vectorizer, version_dir, chunk_size, workers)
+        timer.stage('transform', started)
+
+        started = time.perf_counter()
+        save_tfidf(vectorizer, tfidf_matrix, version_dir)
+        save_nutrition(nutrition, version_dir)
+        timer.stage('write', started)
+
+        started = time.perf_counter()
+        indexed = pd.read_parquet(os.path.join(version_dir, 'recipes.parquet'), columns=['tags_cleaned', 'ingredients'])
+        InvertedIndex.from_recipes(indexed).save(version_dir)
+        timer.stage('index', started)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    publish_version(version_dir, root, keep)
+    print(f"Published {tfidf_matrix.shape[0]} recipes x {tfidf_matrix.shape[1]} terms as {version_dir}/")
+    return version_dir, timer.stages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Build the serving artifacts from RAW_recipes.csv in streamed chunks (two passes: vocabulary, then transform)."
+    )
+    parser.add_argument('recipes_csv', nargs='?', default='RAW_recipes.csv')
+    parser.add_argument('--out', default=ARTIFACTS_DIR)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--keep', type=int, default=3, help="Versions to keep on disk")
+    parser.add_argument('--report', default=None, help="Write the per-stage timing and peak RSS report as JSON")
+    args = parser.parse_args()
+
+    _, stages = build(args.recipes_csv, args.out, args.chunk_size, args.workers, args.keep)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(stages, f, indent=4)
@@ -1,60 +1,316 @@
-from flask import Flask, request, jsonify
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError, as_completed
+from flask import Flask, Response, g, request, jsonify
+import numpy as np
 import pandas as pd
-import pickle
-from sklearn.metrics.pairwise import cosine_similarity
-import requests
-from bs4 import BeautifulSoup
-
-# Load data and models
-def load_models_and_data():
-    recipes = pd.read_csv('preprocessed_recipes.csv')
-    with open('vectorizer.pkl', 'rb') as f:
-        vectorizer = pickle.load(f)
-    with open('tfidf_matrix.pkl', 'rb') as f:
-        tfidf_matrix = pickle.load(f)
-    return recipes, vectorizer, tfidf_matrix
-
-def fetch_poster(recipe_name, recipe_id):
-    url = f"https://www.food.com/recipe/{recipe_name}-{recipe_id}"
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            return None
-        soup = BeautifulSoup(response.content, 'html.parser')
-        div_tag = soup.find('div', {'class': 'primary-image svelte-wgcq7z'})
-        if div_tag:
-            img_tag = div_tag.find('img')
-            if img_tag and 'srcset' in img_tag.attrs:
-                return img_tag['srcset'].split(' ')[0]
-            elif img_tag and 'src' in img_tag.attrs:
-                return img_tag['src']
-    except Exception as e:
-        print(f"Error fetching poster for recipe: {recipe_name}-{recipe_id}: {e}")
-    return None
-
-def filter_recipes_by_preferences(preferences, recipes):
-    filtered_recipes = recipes.copy()
-    for pref in preferences:
-        filtered_recipes = filtered_recipes[filtered_recipes['tags_cleaned'].str.contains(pref, case=False, na=False)]
-    return filtered_recipes
-
-def recommend_recipes(preferences, recipes, vectorizer, tfidf_matrix):
-    filtered_recipes = filter_recipes_by_preferences(preferences, recipes)
-    if filtered_recipes.empty:
+from ann_index import IVFIndex, ann_rank
+from artifacts import current_version
+import metrics
+from meal_plan import DEFAULT_TARGETS, MEAL_SLOTS, plan_meals, slot_candidates
+from model_loader import ModelArtifacts
+from neighbors import load_neighbors
+from nutrition import NUTRITION_FIELDS
+from posters import POSTER_PAGE_DEADLINE, fetch_posters, start_poster_fetches
+from profiler import PROFILER_ENABLED, render_folded, sample_stacks
+from recipe_store import as_list
+from substitutions import HEALTH_CONDITIONS
+from ranking import blend_scores, subset_scores, top_k_indices
+from result_cache import ResultCache, make_key
+
+DEFAULT_TOP_K = 20
+MAX_TOP_K = 100
+MAX_BATCH_SIZE = 1000
+# "exact" scores every filtered recipe; "ann" retrieves candidates from the IVF index and re-ranks them exactly
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "exact")
+MAX_MEAL_PLAN_DAYS = 14
+# Best-matching recipes the meal planner chooses from
+MEAL_PLAN_CANDIDATES = 2000
+# Ranked ids kept per cached query; pages beyond this depth are computed directly
+RESULT_CACHE_DEPTH = MAX_TOP_K
+# Queries scored per sparse matrix product in a batch (bounds the product's memory)
+BATCH_CHUNK_SIZE = 256
+# Streamed responses (?stream=1 or Accept: application/x-ndjson) may ask for more results per call
+MAX_STREAM_TOP_K = 1000
+# Recipes serialized (and posters started) per step of a streamed response
+STREAM_CHUNK_SIZE = 20
+# How often a worker checks ARTIFACTS_DIR for a newly published version
+ARTIFACTS_POLL_SECONDS = float(os.environ.get("ARTIFACTS_POLL_SECONDS", "10"))
+
+logger = logging.getLogger(__name__)
+
+def filter_recipes_by_preferences(preferences, recipe_index):
+    """Sorted row ids of the recipes tagged with every preference.
+
+    Row ids from the inverted index are positions in both `recipes` and `tfidf_matrix`.
+    """
+    with metrics.stage('filter'):
+        return recipe_index.filter(tags=preferences)
+
+def recommend_recipes(preferences, recipes, vectorizer, tfidf_matrix, recipe_index, top_k=None, offset=0, tfidf_columns=None, ranking_prior=None):
+    row_ids = filter_recipes_by_preferences(preferences, recipe_index)
+    if len(row_ids) == 0:
         return pd.DataFrame()
-    filtered_recipes = filtered_recipes.reset_index(drop=True)
-    filtered_indices = filtered_recipes.index
-    filtered_tfidf_matrix = tfidf_matrix[filtered_indices]
     user_query = " ".join(preferences)
-    user_vector = vectorizer.transform([user_query])
-    similarity_scores = cosine_similarity(user_vector, filtered_tfidf_matrix).flatten()
-    sorted_indices = similarity_scores.argsort()[::-1]
-    recommended_recipes = filtered_recipes.iloc[sorted_indices]
+    with metrics.stage('vectorize'):
+        user_vector = vectorizer.transform([user_query])
+    with metrics.stage('score'):
+        similarity_scores = subset_scores(user_vector, tfidf_matrix, row_ids, tfidf_columns)
+    with metrics.stage('rank'):
+        sorted_indices = top_k_indices(blend_scores(similarity_scores, ranking_prior, row_ids), top_k, offset)
+    recommended_recipes = recipes.iloc[row_ids[sorted_indices]]
+    recommended_recipes.attrs['total_matches'] = len(row_ids)
     return recommended_recipes
 
+def recommend_recipes_batch(preference_lists, recipes, vectorizer, tfidf_matrix, recipe_index, top_k=DEFAULT_TOP_K, ranking_prior=None):
+    """Top-`top_k` recommendations for many preference lists at once.
+
+    All queries are vectorized with one `transform` call and scored with one sparse
+    product against `tfidf_matrix` per chunk. TF-IDF rows are L2-normalized, so the
+    dot product is the cosine similarity. Returns one DataFrame per query, in order.
+    """
+    query_matrix = vectorizer.transform([" ".join(preferences) for preferences in preference_lists])
+    results = []
+    scores = np.zeros(tfidf_matrix.shape[0])
+    for start in range(0, len(preference_lists), BATCH_CHUNK_SIZE):
+        # (recipes x queries) keeps the large matrix in its CSR layout; only the small query block is converted
+        chunk_scores = (tfidf_matrix @ query_matrix[start:start + BATCH_CHUNK_SIZE].T).T.tocsr()
+        for i, preferences in enumerate(preference_lists[start:start + BATCH_CHUNK_SIZE]):
+            row_ids = filter_recipes_by_preferences(preferences, recipe_index)
+            if len(row_ids) == 0:
+                results.append(pd.DataFrame())
+                continue
+            row_start, row_end = chunk_scores.indptr[i], chunk_scores.indptr[i + 1]
+            columns = chunk_scores.indices[row_start:row_end]
+            scores[columns] = chunk_scores.data[row_start:row_end]
+            best = top_k_indices(blend_scores(scores[row_ids], ranking_prior, row_ids), top_k)
+            scores[columns] = 0
+            recommended_recipes = recipes.iloc[row_ids[best]]
+            recommended_recipes.attrs['total_matches'] = len(row_ids)
+            results.append(recommended_recipes)
+    return results
+
+def parse_preferences(data):
+    preferences = []
+    if data.get('preference'):
+        preferences.append(data['preference'])
+    if data.get('Cuisine'):
+        preferences.append(data['Cuisine'])
+    if data.get('taste'):
+        preferences.extend(data['taste'].split(","))
+    if data.get('ingredients'):
+        preferences.append(data['ingredients'])
+    return preferences
+
+def parse_int(data, name, default):
+    """Integer request field `name` (or `default` when absent); raises ValueError when it is not an integer."""
+    value = data.get(name, default)
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer.") from None
+
+def parse_health_conditions(data):
+    """The request's `health_conditions` list, or None when absent; raises ValueError for unknown conditions."""
+    conditions = data.get('health_conditions')
+    if conditions is None:
+        return None
+    if not isinstance(conditions, list) or any(condition not in HEALTH_CONDITIONS for condition in conditions):
+        raise ValueError(f"'health_conditions' must be a list of {HEALTH_CONDITIONS}.")
+    return conditions
+
+def page_substitutions(model, recommendations, health_conditions):
+    """Substituted ingredient lists of a page of recommendations, from the model's precomputed tables."""
+    with metrics.stage('substitute'):
+        positions = model.recipe_positions.get_indexer(recommendations['id'])
+        ingredient_lists = [as_list(value) for value in recommendations['ingredients']]
+        return model.recipe_substitutions().substitute_page(positions, ingredient_lists, health_conditions)
+
+def serialize_recipes(recommendations, poster_urls, substituted_ingredients=None):
+    # Column-wise: the list columns yield plain lists per value (rows would turn them into arrays)
+    columns = [recommendations[name] for name in ('name', 'tags', 'ingredients', 'steps')]
+    response = []
+    for position, ((name, tags, ingredients, steps), poster_url) in enumerate(zip(zip(*columns), poster_urls)):
+        recipe = {
+            "name": name,
+            "tags": as_list(tags),
+            "ingredients": as_list(ingredients),
+            "steps": as_list(steps),
+            "poster_url": poster_url
+        }
+        if substituted_ingredients is not None:
+            recipe["substituted_ingredients"] = substituted_ingredients[position]
+        response.append(recipe)
+    return response
+
+def stream_recipes(recommendations, deadline=POSTER_PAGE_DEADLINE, substitute=None):
+    """NDJSON lines for `recommendations`, in score order.
+
+    Each recipe line carries its cached poster (or null) and is written right away;
+    posters that had to be scraped follow as {"type": "poster"} lines as they
+    resolve, until `deadline` seconds after the last recipe. Only one chunk of
+    recipes is serialized at a time; `substitute(chunk)`, if given, supplies the
+    chunk's substituted ingredient lists.
+    """
+    pending, scrapes = {}, 0
+    for start in range(0, len(recommendations), STREAM_CHUNK_SIZE):
+        chunk = recommendations.iloc[start:start + STREAM_CHUNK_SIZE]
+        recipe_ids = [int(recipe_id) for recipe_id in chunk['id']]
+        poster_urls, futures = start_poster_fetches(list(zip(chunk['name'], recipe_ids)))
+        substituted = substitute(chunk) if substitute is not None else None
+        for recipe_id, recipe in zip(recipe_ids, serialize_recipes(chunk, poster_urls, substituted)):
+            yield json.dumps({"type": "recipe", "id": recipe_id, **recipe}) + "\n"
+        pending.update({future: recipe_ids[positions[0]] for future, positions in futures.items()})
+        scrapes += len(futures)
+        for future in [future for future in pending if future.done()]:
+            yield json.dumps({"type": "poster", "id": pending.pop(future), "poster_url": future.result()}) + "\n"
+    try:
+        for future in as_completed(list(pending), timeout=deadline):
+            yield json.dumps({"type": "poster", "id": pending.pop(future), "poster_url": future.result()}) + "\n"
+    except TimeoutError:
+        pass
+    metrics.POSTER_LOOKUPS.inc(scrapes - len(pending), result='scraped')
+    metrics.POSTER_LOOKUPS.inc(len(pending), result='timeout')
+
+def wants_stream():
+    if request.args.get('stream') == '1':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+class RecommendationModel(ModelArtifacts):
+    """Everything a request reads, loaded from one artifact version.
+
+    Reloading builds a new instance and swaps the module-level `model` reference in
+    one assignment, so a request sees either the old model or the new one, never a mix.
+    """
+
+    def __init__(self):
+        super().__init__(current_version())
+        self.neighbors = load_neighbors(self.directory)
+        self.ann_index = IVFIndex.load(self.directory) if RETRIEVAL_MODE == "ann" else None
+
+def recommend_recipes_ann(model, preferences, top_k, offset=0):
+    """ANN variant of `recommend_recipes`; returns None when the exact path must be used instead."""
+    row_ids = filter_recipes_by_preferences(preferences, model.recipe_index)
+    if len(row_ids) == 0:
+        return pd.DataFrame()
+    with metrics.stage('vectorize'):
+        user_vector = model.query_encoder.transform([" ".join(preferences)])
+    with metrics.stage('ann_rank'):
+        ranked = ann_rank(user_vector, model.tfidf_matrix, model.ann_index, row_ids, offset + top_k, prior=model.ranking_prior)
+    if ranked is None:
+        return None
+    recommended_recipes = model.recipes.iloc[ranked[offset:offset + top_k]]
+    recommended_recipes.attrs['total_matches'] = len(row_ids)
+    return recommended_recipes
+
+def rank_recipes(model, preferences, top_k, offset=0):
+    if model.ann_index is not None:
+        recommendations = recommend_recipes_ann(model, preferences, top_k, offset)
+        if recommendations is not None:
+            return recommendations
+    return recommend_recipes(preferences, model.recipes, model.query_encoder, model.tfidf_matrix, model.recipe_index, top_k, offset, model.tfidf_columns, model.ranking_prior)
+
+def cached_recommend_recipes(model, preferences, top_k, offset=0):
+    """`recommend_recipes` for canonicalized preferences, served from `result_cache` when possible."""
+    key = (model.version,) + make_key(preferences)
+    preferences = list(key[1])
+    if offset + top_k > RESULT_CACHE_DEPTH:
+        return rank_recipes(model, preferences, top_k, offset)
+
+    with metrics.stage('cache_lookup'):
+        cached = result_cache.get(key)
+    # The exact path costs about the same at any depth, so it fills the cache to RESULT_CACHE_DEPTH;
+    # ANN retrieval is sized from the page, and a deeper page of the same query ranks it again
+    depth = RESULT_CACHE_DEPTH if model.ann_index is None else offset + top_k
+    if cached is not None and len(cached[0]) < min(offset + top_k, cached[1]):
+        cached = None
+    metrics.RESULT_CACHE_LOOKUPS.inc(result='miss' if cached is None else 'hit')
+    if cached is None:
+        recommendations = rank_recipes(model, preferences, depth)
+        if recommendations.empty:
+            cached = (np.empty(0, dtype=np.int64), 0)
+        else:
+            cached = (recommendations['id'].to_numpy(), recommendations.attrs['total_matches'])
+        result_cache.put(key, cached)
+
+    recipe_ids, total_matches = cached
+    if total_matches == 0:
+        return pd.DataFrame()
+    page_ids = recipe_ids[offset:offset + top_k]
+    recommended_recipes = model.recipes.iloc[model.recipe_positions.get_indexer(page_ids)]
+    recommended_recipes.attrs['total_matches'] = total_matches
+    return recommended_recipes
+
+def reload_models():
+    """Load the published artifacts, swap them in and drop every cached result computed from the old ones."""
+    global model
+    model = RecommendationModel()
+    result_cache.clear()
+
+_reload_lock = threading.Lock()
+_last_version_check = 0.0
+
+def _reload_in_background():
+    if not _reload_lock.acquire(blocking=False):
+        return
+    try:
+        if current_version() != model.version:
+            reload_models()
+    except Exception:
+        metrics.ARTIFACT_RELOAD_FAILURES.inc()
+        logger.exception("Error reloading artifacts")
+    finally:
+        _reload_lock.release()
+
 app = Flask(__name__)
 
-recipes, vectorizer, tfidf_matrix = load_models_and_data()
+result_cache = ResultCache()
+reload_models()
+
+@app.before_request
+def check_for_new_artifacts():
+    """Hot-swap the model when a new artifact version is published; requests keep using the old one meanwhile."""
+    global _last_version_check
+    now = time.monotonic()
+    if now - _last_version_check < ARTIFACTS_POLL_SECONDS:
+        return
+    _last_version_check = now
+    if current_version() != model.version and not _reload_lock.locked():
+        threading.Thread(target=_reload_in_background, daemon=True).start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    if 'request_started' in g:
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=endpoint)
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def profile():
+    """Sample every thread's stack for `seconds` (default 10) and return folded stacks; needs PROFILER_ENABLED=1."""
+    if not PROFILER_ENABLED:
+        return jsonify({"error": "Profiling is disabled; start the API with PROFILER_ENABLED=1."}), 404
+    samples = sample_stacks(float(request.args.get('seconds', 10)))
+    if samples is None:
+        return jsonify({"error": "A profile is already being captured."}), 409
+    return Response(render_folded(samples), mimetype='text/plain')
 
 @app.route('/')
 def home():
@@ -64,31 +320,136 @@ def home():
 def recommend():
     try:
         data = request.get_json()
-        preferences = []
-        if data.get('preference'):
-            preferences.append(data['preference'])
-        if data.get('Cuisine'):
-            preferences.append(data['Cuisine'])
-        if data.get('taste'):
-            preferences.extend(data['taste'].split(","))
-        if data.get('ingredients'):
-            preferences.append(data['ingredients'])
-
-        recommendations = recommend_recipes(preferences, recipes, vectorizer, tfidf_matrix)
+        preferences = parse_preferences(data)
+        stream = wants_stream()
+        try:
+            health_conditions = parse_health_conditions(data)
+            top_k = min(parse_int(data, 'top_k', data.get('limit', DEFAULT_TOP_K)), MAX_STREAM_TOP_K if stream else MAX_TOP_K)
+            offset = parse_int(data, 'offset', 0)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if top_k < 1 or offset < 0:
+            return jsonify({"error": "'top_k' must be positive and 'offset' must not be negative."}), 400
+
+        current = model
+        recommendations = cached_recommend_recipes(current, preferences, top_k, offset)
+        metrics.RESULT_SIZE.observe(len(recommendations), endpoint='/recommend')
+        total_matches = recommendations.attrs.get('total_matches', 0)
+        if total_matches == 0:
+            return jsonify({"message": "No recipes found matching your preferences."}), 404
+        if recommendations.empty and not stream:
+            # Paged past the last match: an empty page, so clients can tell the end of results from no matches
+            return jsonify([]), 200, {"X-Total-Count": str(total_matches)}
+        substitute = None if health_conditions is None else (lambda page: page_substitutions(current, page, health_conditions))
+        if stream:
+            return Response(stream_recipes(recommendations, substitute=substitute), mimetype='application/x-ndjson',
+                            headers={"X-Total-Count": str(total_matches)})
+
+        with metrics.stage('posters'):
+            poster_urls = fetch_posters(list(zip(recommendations['name'], recommendations['id'])))
+        substituted = substitute(recommendations) if substitute is not None else None
+        with metrics.stage('serialize'):
+            response = serialize_recipes(recommendations, poster_urls, substituted)
+        return jsonify(response), 200, {"X-Total-Count": str(total_matches)}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    try:
+        data = request.get_json()
+        queries = data.get('queries')
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"error": "'queries' must be a non-empty list of preference objects."}), 400
+        if len(queries) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} queries per batch."}), 400
+        try:
+            top_k = min(parse_int(data, 'top_k', DEFAULT_TOP_K), MAX_TOP_K)
+            health_conditions = parse_health_conditions(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if top_k < 1:
+            return jsonify({"error": "'top_k' must be positive."}), 400
+
+        current = model
+        preference_lists = [parse_preferences(query) for query in queries]
+        with metrics.stage('batch_score'):
+            batch = recommend_recipes_batch(preference_lists, current.recipes, current.query_encoder, current.tfidf_matrix, current.recipe_index, top_k, current.ranking_prior)
+        for recommendations in batch:
+            metrics.RESULT_SIZE.observe(len(recommendations), endpoint='/recommend/batch')
+
+        # Resolve every poster in the batch under a single page deadline
+        poster_keys = list({
+            (name, recipe_id)
+            for recommendations in batch if not recommendations.empty
+            for name, recipe_id in zip(recommendations['name'], recommendations['id'])
+        })
+        with metrics.stage('posters'):
+            poster_by_key = dict(zip(poster_keys, fetch_posters(poster_keys)))
+
+        response = []
+        for recommendations in batch:
+            if recommendations.empty:
+                response.append([])
+                continue
+            poster_urls = [poster_by_key[key] for key in zip(recommendations['name'], recommendations['id'])]
+            substituted = None if health_conditions is None else page_substitutions(current, recommendations, health_conditions)
+            response.append(serialize_recipes(recommendations, poster_urls, substituted))
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/similar/<int:recipe_id>', methods=['GET'])
+def similar(recipe_id):
+    try:
+        current = model
+        if current.neighbors is None:
+            return jsonify({"error": "Similar recipes are not available; build them with 'python neighbors.py'."}), 503
+        if recipe_id not in current.recipe_positions:
+            return jsonify({"message": f"Recipe {recipe_id} not found."}), 404
+        neighbor_indices, _ = current.neighbors
+        position = current.recipe_positions.get_loc(recipe_id)
+        if position >= len(neighbor_indices):
+            return jsonify({"message": f"Similar recipes for {recipe_id} are not available until the next full rebuild."}), 404
+        top_k = min(int(request.args.get('top_k', neighbor_indices.shape[1])), neighbor_indices.shape[1])
+        if top_k < 1:
+            return jsonify({"error": "'top_k' must be positive."}), 400
+
+        similar_recipes = current.recipes.iloc[neighbor_indices[position, :top_k]]
+        poster_urls = fetch_posters(list(zip(similar_recipes['name'], similar_recipes['id'])))
+        return jsonify(serialize_recipes(similar_recipes, poster_urls)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/meal-plan', methods=['POST'])
+def meal_plan():
+    try:
+        data = request.get_json()
+        preferences = parse_preferences(data)
+        days = int(data.get('days', 7))
+        if not 1 <= days <= MAX_MEAL_PLAN_DAYS:
+            return jsonify({"error": f"'days' must be between 1 and {MAX_MEAL_PLAN_DAYS}."}), 400
+        targets = {name: float(data[name]) for name in DEFAULT_TARGETS if data.get(name)}
+
+        current = model
+        recommendations = rank_recipes(current, preferences, MEAL_PLAN_CANDIDATES)
         if recommendations.empty:
             return jsonify({"message": "No recipes found matching your preferences."}), 404
+        candidate_rows = current.recipe_positions.get_indexer(recommendations['id'])
+        try:
+            plan, totals = plan_meals(current.nutrition, slot_candidates(candidate_rows, current.recipe_index), days, targets)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 404
 
+        planned_recipes = current.recipes.iloc[plan.ravel()]
+        poster_urls = fetch_posters(list(zip(planned_recipes['name'], planned_recipes['id'])))
+        meals = serialize_recipes(planned_recipes, poster_urls)
         response = []
-        for _, row in recommendations.iterrows():
-            recipe_name = row['name'].replace(" ", "-").lower()
-            recipe_id = row['id']
-            poster_url = fetch_poster(recipe_name, recipe_id)
+        for day in range(days):
             response.append({
-                "name": row['name'],
-                "tags": row['tags'],
-                "ingredients": eval(row['ingredients']),
-                "steps": eval(row['steps']),
-                "poster_url": poster_url
+                "day": day + 1,
+                "meals": dict(zip(MEAL_SLOTS, meals[day * len(MEAL_SLOTS):(day + 1) * len(MEAL_SLOTS)])),
+                "totals": {field: round(float(value), 1) for field, value in zip(NUTRITION_FIELDS, totals[day])}
             })
         return jsonify(response), 200
     except Exception as e:
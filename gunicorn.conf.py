@@ -0,0 +1,51 @@
+# Production server for the recommendation API:
+#   gunicorn -c gunicorn.conf.py flask_api:app
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("API_BIND", "0.0.0.0:4321")
+
+# Workers write their metrics here and /metrics sums them; set before flask_api imports metrics
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), f"recipe-api-metrics-{os.getpid()}"))
+
+# Import flask_api (and load the model) once in the master; workers share it copy-on-write
+preload_app = True
+
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+# Threads let one worker keep serving while another request waits on poster scraping
+worker_class = "gthread"
+threads = int(os.environ.get("API_THREADS", "8"))
+
+timeout = int(os.environ.get("API_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get("API_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def pre_fork(server, worker):
+    # Move the preloaded model into the permanent GC generation so collections in the
+    # workers don't touch (and un-share) its pages
+    gc.freeze()
+
+
+def on_starting(server):
+    # Counters restart with the server, so drop files left by a previous run
+    shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
+
+
+def post_fork(server, worker):
+    import metrics
+    metrics.REGISTRY.start_writer()
+
+
+def worker_exit(server, worker):
+    # Write the final values so a replaced worker's requests stay counted
+    import metrics
+    metrics.REGISTRY.write_snapshot()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ann_index import IVFIndex
+from artifacts import ARTIFACTS_DIR, create_version, load_artifacts, publish_version, resolve_artifacts_dir, save_artifacts
+from neighbors import build_neighbors, load_neighbors, save_neighbors
+from recipe_store import parse_list_columns
+
+# Columns of RAW_recipes.csv the apps use (same selection as RRS.ipynb)
+RECIPE_COLUMNS = ['name', 'id', 'minutes', 'tags', 'nutrition', 'steps', 'description', 'ingredients', 'n_ingredients']
+
+
+def prepare_recipes(raw_recipes):
+    """Parse the list columns of raw food.com rows and derive `tags_cleaned` and
+    `text_data`, as the notebook does."""
+    recipes = parse_list_columns(raw_recipes[RECIPE_COLUMNS].copy())
+    recipes['tags_cleaned'] = [" ".join(value) for value in recipes['tags']]
+    recipes['text_data'] = (
+        recipes['tags_cleaned'] + " " + recipes['description'] + " " + pd.Series([" ".join(value) for value in recipes['ingredients']], index=recipes.index)
+    ).fillna("")
+    return recipes
+
+
+def ingest(raw_recipes, root=ARTIFACTS_DIR, keep=3):
+    """Append new recipes to the current artifact version without refitting the vectorizer.
+
+    New rows are transformed with the existing vocabulary and idf weights and stacked
+    under the TF-IDF matrix; the result is written to a new version directory and
+    published atomically. Recipes whose id already exists are skipped. The ANN index
+    and the neighbor table are extended when present (new rows get neighbors, old
+    rows keep theirs until the next full refit). Returns the new version directory,
+    or None when there was nothing to add.
+    """
+    source = resolve_artifacts_dir(root)
+    recipes, vectorizer, tfidf_matrix = load_artifacts(source)
+    new_recipes = prepare_recipes(raw_recipes)
+    new_recipes = new_recipes[~new_recipes['id'].isin(recipes['id'])].drop_duplicates('id')
+    if new_recipes.empty:
+        return None
+
+    new_rows = vectorizer.transform(new_recipes['text_data'])
+    all_recipes = pd.concat([recipes, new_recipes], ignore_index=True)
+    all_rows = sparse.vstack([tfidf_matrix, new_rows], format='csr')
+
+    version_dir = create_version(root)
+    try:
+        save_artifacts(all_recipes, vectorizer, all_rows, version_dir)
+        ann_index = IVFIndex.load(source)
+        if ann_index is not None:
+            ann_index = ann_index.extend(new_rows)
+            ann_index.save(version_dir)
+        neighbors = load_neighbors(source)
+        if neighbors is not None and ann_index is not None:
+            new_indices, new_scores = build_neighbors(ann_index.embeddings, neighbors[0].shape[1], start=len(recipes))
+            save_neighbors(np.concatenate([neighbors[0], new_indices]), np.concatenate([neighbors[1], new_scores]), version_dir)
+        elif neighbors is not None:
+            # Without embeddings the new rows have no neighbors yet; old rows keep theirs
+            save_neighbors(np.asarray(neighbors[0]), np.asarray(neighbors[1]), version_dir)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    publish_version(version_dir, root, keep)
+    return version_dir
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Add new recipes (RAW_recipes.csv format) to the published artifacts without a full refit."
+    )
+    parser.add_argument('recipes_csv')
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR)
+    parser.add_argument('--keep', type=int, default=3, help="Versions to keep on disk")
+    args = parser.parse_args()
+
+    version_dir = ingest(pd.read_csv(args.recipes_csv), args.artifacts, args.keep)
+    if version_dir is None:
+        print("No new recipes to add.")
+    else:
+        print(f"Published {os.path.basename(version_dir)}")
@@ -0,0 +1,73 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import ARTIFACTS_DIR
+
+INTERACTIONS_CSV = "RAW_interactions.csv"
+INTERACTION_FEATURES_PATH = os.environ.get(
+    "INTERACTION_FEATURES_PATH", os.path.join(ARTIFACTS_DIR, "interaction_features.npz")
+)
+CHUNK_SIZE = 500000
+
+# Ratings count as this many votes for the global mean, so a single 5-star review doesn't top the list
+RATING_PRIOR_VOTES = 10
+
+
+def aggregate_interactions(path=INTERACTIONS_CSV, chunk_size=CHUNK_SIZE):
+    """Per-recipe interaction counts and smoothed mean ratings, streamed from the interactions CSV.
+
+    Only `recipe_id` and `rating` are parsed, one chunk at a time, so memory is bounded
+    by the number of recipes, not the number of interactions. A rating of 0 is a review
+    without stars: it counts as an interaction but not as a rating.
+    """
+    totals = None
+    for chunk in pd.read_csv(path, usecols=['recipe_id', 'rating'], chunksize=chunk_size):
+        rated = chunk['rating'] > 0
+        part = pd.DataFrame({
+            'count': 1,
+            'rated': rated.astype(np.int64),
+            'stars': chunk['rating'].where(rated, 0).astype(np.int64),
+        }).groupby(chunk['recipe_id'].to_numpy()).sum()
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32), 0.0
+
+    rated, stars = totals['rated'].to_numpy(np.float64), totals['stars'].to_numpy(np.float64)
+    global_rating = stars.sum() / max(rated.sum(), 1)
+    ratings = (stars + RATING_PRIOR_VOTES * global_rating) / (rated + RATING_PRIOR_VOTES)
+    return (
+        totals.index.to_numpy(np.int64),
+        totals['count'].to_numpy(np.float32),
+        ratings.astype(np.float32),
+        float(global_rating),
+    )
+
+
+def save_interaction_features(recipe_ids, counts, ratings, global_rating, path=INTERACTION_FEATURES_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, recipe_id=recipe_ids, count=counts, rating=ratings, global_rating=np.float32(global_rating))
+    os.replace(tmp_path, path)
+
+
+def load_interaction_features(path=INTERACTION_FEATURES_PATH):
+    """The saved aggregates as a dict of arrays, or None when the job hasn't been run."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate food.com interactions into per-recipe popularity and rating features.")
+    parser.add_argument('--interactions', default=INTERACTIONS_CSV)
+    parser.add_argument('--out', default=INTERACTION_FEATURES_PATH)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    recipe_ids, counts, ratings, global_rating = aggregate_interactions(args.interactions, args.chunk_size)
+    save_interaction_features(recipe_ids, counts, ratings, global_rating, args.out)
+    print(f"Wrote features of {len(recipe_ids)} recipes ({int(counts.sum())} interactions, mean rating {global_rating:.2f}) to {args.out}")
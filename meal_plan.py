@@ -0,0 +1,92 @@
+import numpy as np
+
+from nutrition import CALORIES, PROTEIN, SODIUM, SUGAR
+
+MEAL_SLOTS = ['breakfast', 'lunch', 'dinner']
+# Tags that qualify a recipe for a slot (any of them)
+SLOT_TAGS = {
+    'breakfast': ['breakfast', 'brunch'],
+    'lunch': ['lunch', 'salads', 'sandwiches', 'soups-stews'],
+    'dinner': ['main-dish', 'dinner-party'],
+}
+# Share of the daily calorie target each slot aims for when building the first plan
+SLOT_CALORIE_SHARE = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.40}
+
+DEFAULT_TARGETS = {'calories': 2000, 'protein': 100, 'sodium': 100, 'sugar': 100}
+
+
+def _day_cost(totals, targets):
+    """Cost of daily nutrition totals (..., 7): calorie deviation, protein shortfall,
+    sodium and sugar excess, each relative to its target. Works on stacked totals."""
+    calories = np.abs(totals[..., CALORIES] - targets['calories']) / targets['calories']
+    protein = np.maximum(targets['protein'] - totals[..., PROTEIN], 0) / targets['protein']
+    sodium = np.maximum(totals[..., SODIUM] - targets['sodium'], 0) / targets['sodium']
+    sugar = np.maximum(totals[..., SUGAR] - targets['sugar'], 0) / targets['sugar']
+    return calories ** 2 + protein ** 2 + sodium ** 2 + sugar ** 2
+
+
+def slot_candidates(candidate_rows, recipe_index, slots=MEAL_SLOTS):
+    """Candidate row ids per slot: the candidates carrying one of the slot's tags,
+    or all candidates when none do."""
+    candidate_rows = np.asarray(candidate_rows)
+    result = {}
+    for slot in slots:
+        tagged = [recipe_index.filter(tags=[tag]) for tag in SLOT_TAGS.get(slot, [slot])]
+        tagged = np.unique(np.concatenate(tagged)) if tagged else np.empty(0, dtype=np.int32)
+        rows = candidate_rows[np.isin(candidate_rows, tagged)]
+        result[slot] = rows if len(rows) else candidate_rows
+    return result
+
+
+def plan_meals(nutrition, candidates_by_slot, days=7, targets=None, max_passes=20):
+    """Fill `days` x slots with distinct recipes whose daily totals best meet `targets`.
+
+    A greedy pass picks, per slot, the unused candidate closest to the slot's share
+    of the calorie target; local search then repeatedly replaces each slot with the
+    unused candidate that most lowers its day's cost (all candidates of a slot are
+    scored in one vectorized step) until no move improves the plan.
+
+    Returns (plan, totals): plan is a (days, n_slots) array of row ids, totals the
+    (days, 7) nutrition sums.
+    """
+    targets = {**DEFAULT_TARGETS, **(targets or {})}
+    slots = list(candidates_by_slot)
+    pools = [np.asarray(candidates_by_slot[slot]) for slot in slots]
+    distinct = np.unique(np.concatenate(pools)) if pools else np.empty(0)
+    if len(distinct) < days * len(slots):
+        raise ValueError(f"Need {days * len(slots)} distinct candidate recipes, found {len(distinct)}.")
+    pool_nutrition = [np.asarray(nutrition[pool], dtype=np.float64) for pool in pools]
+
+    used = set()
+    plan = np.empty((days, len(slots)), dtype=np.int64)
+    for day in range(days):
+        for s, slot in enumerate(slots):
+            share = SLOT_CALORIE_SHARE.get(slot, 1 / len(slots)) * targets['calories']
+            distance = np.abs(pool_nutrition[s][:, CALORIES] - share)
+            for i in np.argsort(distance, kind='stable'):
+                if pools[s][i] not in used:
+                    break
+            else:
+                raise ValueError(f"Not enough distinct '{slot}' candidates for {days} days.")
+            plan[day, s] = pools[s][i]
+            used.add(int(pools[s][i]))
+    totals = np.asarray(nutrition[plan.ravel()], dtype=np.float64).reshape(days, len(slots), -1).sum(axis=1)
+
+    for _ in range(max_passes):
+        improved = False
+        for day in range(days):
+            for s in range(len(slots)):
+                current = plan[day, s]
+                base = totals[day] - np.asarray(nutrition[current], dtype=np.float64)
+                costs = _day_cost(base + pool_nutrition[s], targets)
+                costs[np.isin(pools[s], list(used - {int(current)}))] = np.inf
+                best = int(np.argmin(costs))
+                if costs[best] < _day_cost(totals[day], targets) - 1e-9 and pools[s][best] != current:
+                    used.discard(int(current))
+                    used.add(int(pools[s][best]))
+                    plan[day, s] = pools[s][best]
+                    totals[day] = base + pool_nutrition[s][best]
+                    improved = True
+        if not improved:
+            break
+    return plan, totals
@@ -0,0 +1,198 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; one request stage ranges from microseconds (cache hits) to seconds (scraping)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 250, 500, 1000)
+# Shared directory for multi-process servers: each process writes its values to a file
+# there and /metrics sums every file (set by gunicorn.conf.py; unset means in-process only)
+METRICS_DIR = os.environ.get("METRICS_DIR") or None
+# How often a worker rewrites its file; other workers' values may lag /metrics by this much
+METRICS_WRITE_SECONDS = float(os.environ.get("METRICS_WRITE_SECONDS", "1"))
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic counter, one value per combination of label values."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def add(value, other):
+        return value + other
+
+    def render(self, values=None):
+        """Exposition lines for `values` (a `snapshot`, possibly merged across processes), default this process's."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted((self.snapshot() if values is None else values).items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    @staticmethod
+    def add(value, other):
+        return [a + b for a, b in zip(value[0], other[0])], value[1] + other[1]
+
+    def render(self, values=None):
+        """Exposition lines for `values` (a `snapshot`, possibly merged across processes), default this process's."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        values = self.snapshot() if values is None else values
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """The metrics of one process; with a `directory`, rendering sums the files every process writes there."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._metrics = []
+        self._writer_pid = None
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def write_snapshot(self):
+        """Atomically replace this process's file in `directory` with its current values."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        snapshot = {
+            metric.name: [[list(key), value] for key, value in metric.snapshot().items()] for metric in self._metrics
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(snapshot, f)
+        os.replace(path + ".tmp", path)
+
+    def _write_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning("Error writing metrics to %s: %s", self.directory, e)
+
+    def start_writer(self, interval=METRICS_WRITE_SECONDS):
+        """Write this process's file every `interval` seconds from a daemon thread (once per process)."""
+        if self.directory is None or self._writer_pid == os.getpid():
+            return
+        self._writer_pid = os.getpid()
+        threading.Thread(target=self._write_periodically, args=(interval,), daemon=True).start()
+
+    def _merged_snapshots(self):
+        # Files of exited workers stay, so counters never go backwards when a worker is replaced
+        self.write_snapshot()
+        merged = {metric.name: {} for metric in self._metrics}
+        adders = {metric.name: metric.add for metric in self._metrics}
+        for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, value in values:
+                    key = tuple(key)
+                    current = merged[name].get(key)
+                    merged[name][key] = value if current is None else adders[name](current, value)
+        return merged
+
+    def render(self):
+        """All metrics as Prometheus text exposition format (version 0.0.4)."""
+        values = self._merged_snapshots() if self.directory is not None else {}
+        return "\n".join(line for metric in self._metrics for line in metric.render(values.get(metric.name))) + "\n"
+
+
+REGISTRY = Registry(METRICS_DIR)
+
+REQUESTS = REGISTRY.counter("recipe_api_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+REQUEST_SECONDS = REGISTRY.histogram("recipe_api_request_seconds", "HTTP request latency by endpoint.", ("endpoint",))
+STAGE_SECONDS = REGISTRY.histogram("recipe_api_stage_seconds", "Latency of each recommendation stage.", ("stage",))
+RESULT_SIZE = REGISTRY.histogram("recipe_api_result_size", "Recipes returned per query.", ("endpoint",), SIZE_BUCKETS)
+RESULT_CACHE_LOOKUPS = REGISTRY.counter("recipe_api_result_cache_lookups_total", "Ranked-result cache lookups.", ("result",))
+POSTER_LOOKUPS = REGISTRY.counter(
+    "recipe_api_poster_lookups_total", "Poster lookups by outcome (hit, scraped, timeout, skipped, shed).", ("result",)
+)
+POSTER_SCRAPE_FAILURES = REGISTRY.counter("recipe_api_poster_scrape_failures_total", "Poster scrapes that raised an error.")
+ARTIFACT_RELOAD_FAILURES = REGISTRY.counter("recipe_api_artifact_reload_failures_total", "Hot reloads of a newly published artifact version that raised an error.")
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block into STAGE_SECONDS under `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
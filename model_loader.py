@@ -0,0 +1,61 @@
+import os
+import pickle
+
+import pandas as pd
+
+from artifacts import ARTIFACTS_DIR, has_artifacts, load_artifacts, load_tfidf_columns
+from interactions import load_interaction_features
+from nutrition import load_nutrition, nutrition_matrix
+from query_encoder import make_query_encoder
+from ranking import feature_prior, recipe_features
+from recipe_index import InvertedIndex
+from recipe_store import load_recipe_store
+from substitutions import RecipeSubstitutions
+
+
+def load_models_and_data(directory=ARTIFACTS_DIR):
+    """(recipes, vectorizer, tfidf_matrix) from an artifact directory, else from the notebook's pickles."""
+    if has_artifacts(directory):
+        return load_artifacts(directory)
+    recipes = load_recipe_store()
+    with open('vectorizer.pkl', 'rb') as f:
+        vectorizer = pickle.load(f)
+    with open('tfidf_matrix.pkl', 'rb') as f:
+        tfidf_matrix = pickle.load(f)
+    return recipes, vectorizer, tfidf_matrix
+
+
+class ModelArtifacts:
+    """Everything the API and the Streamlit app rank with, loaded from one artifact version.
+
+    `version` names a directory under `root`/versions; None loads `root` itself (a flat
+    artifact directory, or the notebook's pickles when it has none). Parts missing from
+    older artifacts (CSC copy, nutrition, filter postings) are rebuilt in memory.
+    """
+
+    def __init__(self, version=None, root=ARTIFACTS_DIR):
+        self.version = version
+        self.directory = os.path.join(root, 'versions', version) if version else root
+        saved = has_artifacts(self.directory)
+        self.recipes, self.vectorizer, self.tfidf_matrix = load_models_and_data(self.directory)
+        # Same vectors as vectorizer.transform, built without sklearn's per-call overhead
+        self.query_encoder = make_query_encoder(self.vectorizer)
+        self.tfidf_columns = load_tfidf_columns(self.directory) if saved else None
+        if self.tfidf_columns is None:
+            self.tfidf_columns = self.tfidf_matrix.tocsc()
+        self.nutrition = load_nutrition(self.directory) if saved else None
+        if self.nutrition is None:
+            self.nutrition = nutrition_matrix(self.recipes['nutrition'])
+        self.recipe_index = InvertedIndex.load(self.directory, len(self.recipes)) if saved else None
+        if self.recipe_index is None:
+            self.recipe_index = InvertedIndex.from_recipes(self.recipes)
+        self.recipe_positions = pd.Index(self.recipes['id'])
+        # Popularity, rating, time and ingredient-count prior of the hybrid ranking
+        self.ranking_prior = feature_prior(recipe_features(self.recipes, load_interaction_features()))
+        self._substitutions = None
+
+    def recipe_substitutions(self):
+        """Per-recipe ingredient substitutions for the common health-condition sets, built on first use."""
+        if self._substitutions is None:
+            self._substitutions = RecipeSubstitutions(self.recipes['ingredients'])
+        return self._substitutions
@@ -0,0 +1,109 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from artifacts import ARTIFACTS_DIR, resolve_artifacts_dir
+
+NEIGHBORS_TOP_N = 10
+# Similarities held per block; the row count per block is derived from n
+NEIGHBORS_BLOCK_BYTES = 64 * 2**20
+# Each worker holds a copy of the embeddings plus one block, so don't default to every core
+NEIGHBORS_MAX_WORKERS = 4
+
+_embeddings = None
+
+
+def _init_worker(embeddings):
+    global _embeddings
+    _embeddings = embeddings
+
+
+def _block_top_n(args):
+    start, stop, top_n = args
+    block = _embeddings[start:stop]
+    similarities = block @ _embeddings.T
+    # A recipe is never its own neighbor
+    similarities[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+    # Negate in place so the smallest entries are the nearest, without a second block-sized copy
+    np.negative(similarities, out=similarities)
+    top = np.argpartition(similarities, top_n - 1, axis=1)[:, :top_n]
+    top_scores = np.take_along_axis(similarities, top, axis=1)
+    order = np.argsort(top_scores, axis=1, kind='stable')
+    return (
+        start,
+        np.take_along_axis(top, order, axis=1).astype(np.int32),
+        -np.take_along_axis(top_scores, order, axis=1).astype(np.float32),
+    )
+
+
+def build_neighbors(embeddings, top_n=NEIGHBORS_TOP_N, block_size=None, workers=None, start=0):
+    """Top-`top_n` cosine neighbors of every row of `embeddings` from `start` on.
+
+    Rows are scored a block at a time with one matrix product per block (by default
+    as many rows as fit NEIGHBORS_BLOCK_BYTES of similarities), and blocks are spread
+    over a process pool of up to NEIGHBORS_MAX_WORKERS processes (`workers=1` runs
+    in-process). Returns (indices int32 (n - start, top_n), scores float32
+    (n - start, top_n)), best first.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.maximum(norms, 1e-12)
+    n = embeddings.shape[0]
+    top_n = min(top_n, n - 1)
+    if block_size is None:
+        block_size = max(1, NEIGHBORS_BLOCK_BYTES // (4 * n))
+    if workers is None:
+        workers = min(NEIGHBORS_MAX_WORKERS, os.cpu_count() or 1)
+    indices = np.empty((n - start, top_n), dtype=np.int32)
+    scores = np.empty((n - start, top_n), dtype=np.float32)
+    blocks = [(block, min(block + block_size, n), top_n) for block in range(start, n, block_size)]
+
+    if workers == 1:
+        _init_worker(embeddings)
+        results = list(map(_block_top_n, blocks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(embeddings,)) as pool:
+            results = list(pool.map(_block_top_n, blocks))
+    for block, block_indices, block_scores in results:
+        indices[block - start:block - start + len(block_indices)] = block_indices
+        scores[block - start:block - start + len(block_scores)] = block_scores
+    return indices, scores
+
+
+def save_neighbors(indices, scores, directory=ARTIFACTS_DIR):
+    directory = resolve_artifacts_dir(directory)
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'neighbors_indices.npy'), indices.astype(np.int32))
+    np.save(os.path.join(directory, 'neighbors_scores.npy'), scores.astype(np.float32))
+
+
+def load_neighbors(directory=ARTIFACTS_DIR):
+    """Memory-mapped (indices, scores), or None when the neighbor table has not been built."""
+    directory = resolve_artifacts_dir(directory)
+    path = os.path.join(directory, 'neighbors_indices.npy')
+    if not os.path.exists(path):
+        return None
+    return (
+        np.load(path, mmap_mode='r'),
+        np.load(os.path.join(directory, 'neighbors_scores.npy'), mmap_mode='r'),
+    )
+
+
+if __name__ == '__main__':
+    from sklearn.decomposition import TruncatedSVD
+
+    from artifacts import load_tfidf_matrix
+
+    parser = argparse.ArgumentParser(description="Build the 'similar recipes' table from SVD embeddings of the TF-IDF matrix.")
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR)
+    parser.add_argument('--components', type=int, default=20)
+    parser.add_argument('--top-n', type=int, default=NEIGHBORS_TOP_N)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    reduced_matrix = TruncatedSVD(n_components=args.components).fit_transform(load_tfidf_matrix(args.artifacts))
+    indices, scores = build_neighbors(reduced_matrix, args.top_n, workers=args.workers)
+    save_neighbors(indices, scores, args.artifacts)
+    print(f"Wrote {args.top_n} neighbors for {len(indices)} recipes to {args.artifacts}/")
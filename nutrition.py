@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+
+# Column order of the dataset's `nutrition` lists (all but calories are % daily value)
+NUTRITION_FIELDS = ['calories', 'fat', 'sugar', 'sodium', 'protein', 'saturated_fat', 'fiber']
+CALORIES, FAT, SUGAR, SODIUM, PROTEIN, SATURATED_FAT, FIBER = range(len(NUTRITION_FIELDS))
+
+# Best protein-per-calorie candidates passed to the exact knapsack solver
+KNAPSACK_POOL_SIZE = 200
+
+
+def parse_nutrition(nutrition):
+    """Parse one nutrition value (any sequence, e.g. a list, tuple or numpy/Arrow array,
+    or a string literal) into exactly 7 floats."""
+    try:
+        values = json.loads(nutrition.replace("'", "\"")) if isinstance(nutrition, str) else nutrition
+        if not isinstance(values, (str, dict)):
+            return [float(v) for v in (list(values) + [0] * 7)[:7]]
+    except (TypeError, ValueError):
+        pass
+    return [0.0] * 7
+
+
+def nutrition_matrix(nutrition_column):
+    """(n, 7) float32 matrix of a recipes `nutrition` column, parsed once."""
+    return np.array([parse_nutrition(value) for value in nutrition_column], dtype=np.float32).reshape(-1, 7)
+
+
+def save_nutrition(matrix, directory):
+    np.save(os.path.join(directory, 'nutrition.npy'), matrix.astype(np.float32))
+
+
+def load_nutrition(directory):
+    """Memory-mapped nutrition matrix, or None when the artifact directory predates it."""
+    path = os.path.join(directory, 'nutrition.npy')
+    return np.load(path, mmap_mode='r') if os.path.exists(path) else None
+
+
+def nutrition_mask(nutrition, max_fat=None, max_sodium=None, min_protein=None, max_calories=None, max_sugar=None):
+    """Boolean mask of the rows of `nutrition` meeting every given per-recipe limit."""
+    mask = np.ones(len(nutrition), dtype=bool)
+    for column, limit, upper in (
+        (FAT, max_fat, True), (SODIUM, max_sodium, True), (CALORIES, max_calories, True),
+        (SUGAR, max_sugar, True), (PROTEIN, min_protein, False),
+    ):
+        if limit is not None:
+            mask &= nutrition[:, column] <= limit if upper else nutrition[:, column] >= limit
+    return mask
+
+
+def knapsack_select(nutrition, max_calories=500, max_fat=15, max_sodium=10, min_protein=5, max_recipes=10,
+                    pool_size=KNAPSACK_POOL_SIZE):
+    """Positions (rows of `nutrition`) of the recipe set with the most total protein
+    whose calories fit `max_calories`, using at most `max_recipes` recipes.
+
+    Recipes violating the per-recipe fat/sodium/protein limits are masked out, the
+    best `pool_size` by protein per calorie are kept, and a 0/1 knapsack DP over
+    (recipe count, integer calories) picks the exact optimum among them. Result is
+    ordered by protein per calorie, best first.
+    """
+    nutrition = np.asarray(nutrition, dtype=np.float32)
+    budget = int(max_calories)
+    eligible = np.flatnonzero(nutrition_mask(nutrition, max_fat, max_sodium, min_protein, max_calories=budget))
+    if len(eligible) == 0 or max_recipes < 1:
+        return np.empty(0, dtype=np.intp)
+    ratio = nutrition[eligible, PROTEIN] / (nutrition[eligible, CALORIES] + 1)
+    if len(eligible) > pool_size:
+        keep = np.argpartition(-ratio, pool_size - 1)[:pool_size]
+        eligible, ratio = eligible[keep], ratio[keep]
+
+    weights = np.ceil(nutrition[eligible, CALORIES]).astype(np.int64)
+    values = nutrition[eligible, PROTEIN].astype(np.float64)
+    # best[k, c]: max protein using exactly k recipes and at most c calories
+    best = np.full((max_recipes + 1, budget + 1), -np.inf)
+    best[0] = 0.0
+    taken = np.zeros((len(eligible), max_recipes + 1, budget + 1), dtype=bool)
+    for item, (weight, value) in enumerate(zip(weights, values)):
+        if weight > budget:
+            continue
+        for k in range(min(item + 1, max_recipes), 0, -1):
+            candidate = best[k - 1, :budget + 1 - weight] + value
+            better = candidate > best[k, weight:]
+            best[k, weight:][better] = candidate[better]
+            taken[item, k, weight:] = better
+
+    k = int(np.argmax(best[:, budget]))
+    chosen, capacity = [], budget
+    for item in range(len(eligible) - 1, -1, -1):
+        if k > 0 and taken[item, k, capacity]:
+            chosen.append(item)
+            capacity -= weights[item]
+            k -= 1
+    chosen = np.array(chosen, dtype=np.intp)
+    return eligible[chosen[np.argsort(-ratio[chosen], kind='stable')]]
@@ -0,0 +1,288 @@
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+POSTER_BASE_URL = os.environ.get("POSTER_BASE_URL", "https://www.food.com/recipe")
+POSTER_CACHE_PATH = os.environ.get("POSTER_CACHE_PATH", "poster_cache.sqlite3")
+POSTER_TTL = 30 * 24 * 3600  # Found posters are re-checked monthly
+POSTER_NEGATIVE_TTL = 24 * 3600  # Recipes without a poster are retried daily
+POSTER_TIMEOUT = 10
+POSTER_WORKERS = int(os.environ.get("POSTER_WORKERS", "16"))
+# Upper bound on how long one result page waits for uncached posters
+POSTER_PAGE_DEADLINE = float(os.environ.get("POSTER_PAGE_DEADLINE", "2.0"))
+# Scrapes queued or running at once; further misses are not scraped (None) until the backlog drains
+POSTER_MAX_PENDING = int(os.environ.get("POSTER_MAX_PENDING", "256"))
+# Set to 0 once the prefetch job keeps the cache warm so requests never scrape inline
+POSTER_SCRAPE_ON_MISS = os.environ.get("POSTER_SCRAPE_ON_MISS", "1") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+def recipe_slug(recipe_name):
+    return str(recipe_name).strip().replace(" ", "-").lower()
+
+
+def scrape_poster(recipe_name, recipe_id, session=None, timeout=POSTER_TIMEOUT):
+    """Scrape the primary image URL from the recipe page.
+
+    Returns None when the recipe has no poster (a 404, or a page without an image).
+    Network errors and any other status (429, 403, 5xx) are raised, so callers never
+    cache a transient failure as "no poster".
+    """
+    url = f"{POSTER_BASE_URL}/{recipe_slug(recipe_name)}-{recipe_id}"
+    response = (session or requests).get(url, timeout=timeout)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise requests.HTTPError(f"{response.status_code} from {url}", response=response)
+    soup = BeautifulSoup(response.content, 'html.parser')
+    div_tag = soup.find('div', {'class': 'primary-image svelte-wgcq7z'})
+    if div_tag:
+        img_tag = div_tag.find('img')
+        if img_tag and 'srcset' in img_tag.attrs:
+            return img_tag['srcset'].split(' ')[0]
+        elif img_tag and 'src' in img_tag.attrs:
+            return img_tag['src']
+    return None
+
+
+class PosterCache:
+    """SQLite-backed poster URL cache keyed by recipe id.
+
+    A NULL url is a cached "no poster" result and expires after `negative_ttl`.
+    """
+
+    def __init__(self, path=POSTER_CACHE_PATH, ttl=POSTER_TTL, negative_ttl=POSTER_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS posters ("
+            "recipe_id INTEGER PRIMARY KEY, url TEXT, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, recipe_id):
+        """Return (hit, url); `hit` is False when the entry is missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, fetched_at FROM posters WHERE recipe_id = ?", (int(recipe_id),)
+            ).fetchone()
+        if row is None:
+            return False, None
+        url, fetched_at = row
+        ttl = self.ttl if url else self.negative_ttl
+        if time.time() - fetched_at > ttl:
+            return False, None
+        return True, url
+
+    def set(self, recipe_id, url):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posters (recipe_id, url, fetched_at) VALUES (?, ?, ?)",
+                (int(recipe_id), url, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_poster_cache():
+    """Process-wide cache on POSTER_CACHE_PATH, opened on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PosterCache()
+        return _default_cache
+
+
+_session = None
+_pool = None
+_pool_lock = threading.Lock()
+# (cache path, recipe id) -> Future of the scrape queued or running for it
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _get_session_and_pool():
+    """Keep-alive session and scraper thread pool shared by the whole process."""
+    global _session, _pool
+    with _pool_lock:
+        if _pool is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POSTER_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _pool = ThreadPoolExecutor(max_workers=POSTER_WORKERS, thread_name_prefix="poster")
+        return _session, _pool
+
+
+def _scrape_and_cache(cache, session, recipe_name, recipe_id):
+    try:
+        url = scrape_poster(recipe_name, recipe_id, session=session)
+    except Exception as e:
+        metrics.POSTER_SCRAPE_FAILURES.inc()
+        logger.warning("Error fetching poster for recipe %s-%s: %s", recipe_name, recipe_id, e)
+        return None
+    cache.set(recipe_id, url)
+    return url
+
+
+def _submit_scrape(cache, recipe_name, recipe_id):
+    """Future of the scrape for `recipe_id`, joining one already in flight; None when the backlog is full.
+
+    A scrape outlives the page deadline that gave up on it, so without this a slow
+    site would get the same recipe requested again by every page that shows it.
+    """
+    key = (cache.path, int(recipe_id))
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        if len(_in_flight) >= POSTER_MAX_PENDING:
+            return None
+        session, pool = _get_session_and_pool()
+        future = pool.submit(_scrape_and_cache, cache, session, recipe_name, recipe_id)
+        _in_flight[key] = future
+
+    def forget(done):
+        with _in_flight_lock:
+            if _in_flight.get(key) is done:
+                del _in_flight[key]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def fetch_poster(recipe_name, recipe_id, cache=None, scrape_on_miss=POSTER_SCRAPE_ON_MISS):
+    """Cached poster lookup; scrapes and stores the result on a miss unless `scrape_on_miss` is False."""
+    cache = cache or get_poster_cache()
+    hit, url = cache.get(recipe_id)
+    if hit or not scrape_on_miss:
+        return url
+    future = _submit_scrape(cache, recipe_name, recipe_id)
+    return None if future is None else future.result()
+
+
+def start_poster_fetches(items, cache=None, scrape_on_miss=POSTER_SCRAPE_ON_MISS):
+    """Look up (recipe_name, recipe_id) pairs in the cache and start scraping the misses.
+
+    Returns (urls, futures): the cached URLs in order (None for misses) and a dict
+    mapping each scrape's future to the positions in `items` it resolves. Scrapes
+    already in flight are joined rather than repeated, and misses beyond
+    POSTER_MAX_PENDING outstanding scrapes are left as None.
+    """
+    cache = cache or get_poster_cache()
+    results = [None] * len(items)
+    misses = []
+    hits = 0
+    for position, (recipe_name, recipe_id) in enumerate(items):
+        hit, url = cache.get(recipe_id)
+        if hit:
+            results[position] = url
+            hits += 1
+        elif scrape_on_miss:
+            misses.append((position, recipe_name, recipe_id))
+    metrics.POSTER_LOOKUPS.inc(hits, result='hit')
+    metrics.POSTER_LOOKUPS.inc(len(items) - hits - len(misses), result='skipped')
+    futures = {}
+    shed = 0
+    for position, recipe_name, recipe_id in misses:
+        future = _submit_scrape(cache, recipe_name, recipe_id)
+        if future is None:
+            shed += 1
+        else:
+            futures.setdefault(future, []).append(position)
+    metrics.POSTER_LOOKUPS.inc(shed, result='shed')
+    return results, futures
+
+
+def fetch_posters(items, cache=None, deadline=POSTER_PAGE_DEADLINE, scrape_on_miss=POSTER_SCRAPE_ON_MISS):
+    """Poster URLs for a whole result page of (recipe_name, recipe_id) pairs, in order.
+
+    Cache misses are scraped concurrently on the shared pool; any that have not
+    finished within `deadline` seconds come back as None and keep running in the
+    background so the next request finds them cached.
+    """
+    results, futures = start_poster_fetches(items, cache, scrape_on_miss)
+    if not futures:
+        return results
+    done, _ = wait(futures, timeout=deadline)
+    for future in done:
+        for position in futures[future]:
+            results[position] = future.result()
+    metrics.POSTER_LOOKUPS.inc(len(done), result='scraped')
+    metrics.POSTER_LOOKUPS.inc(len(futures) - len(done), result='timeout')
+    return results
+
+
+def prefetch_posters(recipes, cache=None, workers=8, refresh=False):
+    """Populate the cache for every (name, id) row of `recipes` that is missing or expired."""
+    cache = cache or get_poster_cache()
+    pending = [
+        (name, recipe_id) for name, recipe_id in zip(recipes['name'], recipes['id'])
+        if refresh or not cache.get(recipe_id)[0]
+    ]
+    session, _ = _get_session_and_pool()
+
+    def fetch_one(item):
+        name, recipe_id = item
+        try:
+            cache.set(recipe_id, scrape_poster(name, recipe_id, session=session))
+            return True
+        except Exception as e:
+            metrics.POSTER_SCRAPE_FAILURES.inc()
+            logger.warning("Error fetching poster for recipe %s-%s: %s", name, recipe_id, e)
+            return False
+
+    fetched = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for ok in pool.map(fetch_one, pending):
+            fetched += ok
+            if fetched and fetched % 1000 == 0:
+                logger.info("Cached %d/%d posters", fetched, len(pending))
+    return fetched, len(pending)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    from artifacts import ARTIFACTS_DIR, resolve_artifacts_dir
+    from recipe_store import load_recipe_store
+
+    parser = argparse.ArgumentParser(description="Pre-populate the poster cache for the recipe catalog.")
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR, help="Artifacts whose published recipe store is prefetched")
+    parser.add_argument('--recipes', default=None, help="CSV with name and id columns to prefetch instead of the recipe store")
+    parser.add_argument('--cache', default=POSTER_CACHE_PATH)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--limit', type=int, default=None, help="Only prefetch the first N recipes")
+    parser.add_argument('--refresh', action='store_true', help="Re-scrape entries that are still fresh")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.recipes:
+        recipes = pd.read_csv(args.recipes, usecols=['name', 'id'], nrows=args.limit)
+    else:
+        recipes = load_recipe_store(os.path.join(resolve_artifacts_dir(args.artifacts), 'recipes.parquet'))[['name', 'id']]
+        recipes = recipes.head(args.limit) if args.limit else recipes
+    fetched, pending = prefetch_posters(recipes, PosterCache(args.cache), args.workers, args.refresh)
+    print(f"Prefetched {fetched}/{pending} posters into {args.cache}")
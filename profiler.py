@@ -0,0 +1,49 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# The sampling endpoint is off unless explicitly enabled for a deployment
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL = 0.005
+PROFILER_MAX_SECONDS = 60
+
+_sampling_lock = threading.Lock()
+
+
+def _collapse(frame):
+    """'module:function;...' stack of `frame`, outermost first (folded flame-graph format)."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds, interval=PROFILER_INTERVAL):
+    """Sample the stacks of every other thread every `interval` seconds for `seconds`.
+
+    Returns a Counter of collapsed stacks. Nothing runs outside a sampling window,
+    and only one window runs at a time per process (returns None when busy).
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        return None
+    try:
+        samples = Counter()
+        own_thread = threading.get_ident()
+        deadline = time.monotonic() + min(seconds, PROFILER_MAX_SECONDS)
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_thread:
+                    samples[_collapse(frame)] += 1
+            time.sleep(interval)
+        return samples
+    finally:
+        _sampling_lock.release()
+
+
+def render_folded(samples):
+    """One 'stack count' line per stack, most frequent first; feed to flamegraph.pl or speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
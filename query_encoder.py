@@ -0,0 +1,136 @@
+import argparse
+import re
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import strip_accents_ascii, strip_accents_unicode
+
+from artifacts import ARTIFACTS_DIR
+
+
+class QueryEncoder:
+    """TF-IDF encoder for short queries, exported from a fitted TfidfVectorizer.
+
+    Uses the vectorizer's vocabulary, idf weights, tokenization and normalization,
+    but builds each row directly from a dict of term counts instead of going
+    through sklearn's analyzer pipeline. `transform` returns the same CSR matrix
+    as `TfidfVectorizer.transform`.
+    """
+
+    def __init__(self, vocabulary, idf, token_pattern, lowercase=True, strip_accents=None,
+                 norm='l2', use_idf=True, sublinear_tf=False, binary=False):
+        self.vocabulary = vocabulary
+        self.n_features = len(vocabulary)
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float64)
+        self.token_pattern = re.compile(token_pattern)
+        self.lowercase = lowercase
+        self.strip_accents = {'ascii': strip_accents_ascii, 'unicode': strip_accents_unicode}.get(strip_accents)
+        self.norm = norm
+        self.use_idf = use_idf
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Encoder equivalent to `vectorizer`; raises ValueError for settings it does not reproduce
+        (non-word analyzers, n-grams, custom tokenizers or preprocessors)."""
+        if (vectorizer.analyzer != 'word' or tuple(vectorizer.ngram_range) != (1, 1)
+                or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None
+                or callable(vectorizer.strip_accents)):
+            raise ValueError("QueryEncoder only supports word unigrams with the default tokenizer.")
+        return cls(
+            vectorizer.vocabulary_, vectorizer.idf_ if vectorizer.use_idf else None, vectorizer.token_pattern,
+            vectorizer.lowercase, vectorizer.strip_accents, vectorizer.norm, vectorizer.use_idf,
+            vectorizer.sublinear_tf, vectorizer.binary,
+        )
+
+    def encode(self, text):
+        """Sorted column ids and float64 weights of one text's TF-IDF row."""
+        if self.lowercase:
+            text = text.lower()
+        if self.strip_accents is not None:
+            text = self.strip_accents(text)
+        counts = {}
+        for token in self.token_pattern.findall(text):
+            # Stop words were excluded from the vocabulary when the vectorizer was fitted
+            column = self.vocabulary.get(token)
+            if column is not None:
+                counts[column] = counts.get(column, 0) + 1
+        columns = np.array(sorted(counts), dtype=np.int32)
+        weights = np.array([counts[column] for column in columns], dtype=np.float64)
+        if self.binary:
+            weights[:] = 1
+        elif self.sublinear_tf:
+            weights = np.log(weights) + 1
+        if self.use_idf:
+            weights *= self.idf[columns]
+        if self.norm == 'l2':
+            weights /= max(np.sqrt(weights @ weights), 1e-300) if len(weights) else 1
+        elif self.norm == 'l1':
+            weights /= max(np.abs(weights).sum(), 1e-300) if len(weights) else 1
+        return columns, weights
+
+    def transform(self, texts):
+        """(len(texts), vocabulary) CSR matrix, as `TfidfVectorizer.transform(texts)`."""
+        rows = [self.encode(text) for text in texts]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum([len(columns) for columns, _ in rows], out=indptr[1:])
+        indices = np.concatenate([columns for columns, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+        data = np.concatenate([weights for _, weights in rows]) if rows else np.empty(0)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+
+
+def make_query_encoder(vectorizer):
+    """A QueryEncoder for `vectorizer`, or the vectorizer itself when its settings are not supported."""
+    try:
+        return QueryEncoder.from_vectorizer(vectorizer)
+    except ValueError:
+        return vectorizer
+
+
+def check_parity(vectorizer, encoder, texts):
+    """Largest absolute difference between `encoder` and `vectorizer` over `texts`;
+    raises AssertionError when their sparsity patterns differ."""
+    expected = vectorizer.transform(texts)
+    actual = encoder.transform(texts)
+    assert actual.shape == expected.shape, (actual.shape, expected.shape)
+    expected.sort_indices()
+    assert np.array_equal(actual.indptr, expected.indptr) and np.array_equal(actual.indices, expected.indices), \
+        "encoder and vectorizer produced different terms"
+    return float(np.abs(actual.data - expected.data).max()) if actual.nnz else 0.0
+
+
+def parity_queries(recipes, n=1000, seed=0):
+    """Queries covering the edge cases of the tokenizer plus short tag and ingredient queries from `recipes`."""
+    queries = [
+        "", " ", "the and of", "Vegetarian Italian spicy", "VEGAN  vegan vegan", "crème brûlée",
+        "low-sodium, gluten_free; 30-minutes-or-less", "a b c", "x" * 50, "chicken\tbreast\nrice",
+        "dinner-party main-dish", "café au lait", "1 2 3 4", "sugar-free!!! ??",
+    ]
+    rng = np.random.default_rng(seed)
+    tags = recipes['tags_cleaned'].fillna("").tolist()
+    ingredients = [" ".join(value) for value in recipes['ingredients']]
+    for i in rng.choice(len(recipes), min(n, len(recipes)), replace=False):
+        words = (tags[i] + " " + ingredients[i]).split()
+        queries.append(" ".join(rng.choice(words, min(len(words), rng.integers(1, 6)), replace=False)) if words else "")
+    return queries
+
+
+if __name__ == '__main__':
+    from artifacts import load_artifacts
+
+    parser = argparse.ArgumentParser(description="Check QueryEncoder against TfidfVectorizer.transform and time both.")
+    parser.add_argument('--artifacts', default=ARTIFACTS_DIR)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    recipes, vectorizer, _ = load_artifacts(args.artifacts)
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+    queries = parity_queries(recipes, args.queries)
+    print(f"Parity over {len(queries)} queries: max abs difference {check_parity(vectorizer, encoder, queries):.3g}")
+    for name, function in (('TfidfVectorizer.transform', vectorizer.transform), ('QueryEncoder.transform', encoder.transform)):
+        started = time.perf_counter()
+        for query in queries:
+            function([query])
+        print(f"{name:<26} {(time.perf_counter() - started) / len(queries) * 1e6:8.1f} us/query")
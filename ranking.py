@@ -0,0 +1,131 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def top_k_indices(scores, top_k=None, offset=0):
+    """Positions of the `offset`..`offset + top_k` highest scores, best first.
+
+    Only the requested page is fully ordered; the rest of the scores are split off
+    with `argpartition`, so the cost is O(n + k log k) instead of a full sort.
+    `top_k=None` returns every position from `offset` on.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    offset = max(int(offset), 0)
+    end = n if top_k is None else min(offset + max(int(top_k), 0), n)
+    if offset >= end:
+        return np.empty(0, dtype=np.intp)
+    if end < n:
+        candidates = np.argpartition(-scores, end - 1)[:end]
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return order[offset:end]
+
+
+# Filtered sets larger than this share of the catalog are scored against every row and then selected
+FULL_SCORING_FRACTION = 0.1
+
+
+def query_scores(query_vector, tfidf_columns):
+    """Dot product of a (1, vocabulary) query vector with every row of the matrix.
+
+    `tfidf_columns` is the TF-IDF matrix in CSC layout; only the columns of the
+    query's terms are read.
+    """
+    query_vector = query_vector.tocsr()
+    scores = np.zeros(tfidf_columns.shape[0], dtype=np.float32)
+    for column, weight in zip(query_vector.indices, query_vector.data):
+        start, end = tfidf_columns.indptr[column], tfidf_columns.indptr[column + 1]
+        scores[tfidf_columns.indices[start:end]] += weight * tfidf_columns.data[start:end]
+    return scores
+
+
+def subset_scores(query_vector, tfidf_matrix, row_ids, tfidf_columns=None):
+    """Cosine similarity of the query with the rows `row_ids` of `tfidf_matrix`, in that order.
+
+    TF-IDF rows and queries are L2-normalized, so the dot product is the cosine.
+    Large subsets are scored against the whole matrix through `tfidf_columns`;
+    small ones slice their rows.
+    """
+    if tfidf_columns is not None and len(row_ids) > FULL_SCORING_FRACTION * tfidf_matrix.shape[0]:
+        return query_scores(query_vector, tfidf_columns)[row_ids]
+    return np.asarray((tfidf_matrix[row_ids] @ query_vector.T).todense()).ravel()
+
+
+# Per-recipe signals blended with the similarity score, each scaled to [0, 1]
+FEATURE_NAMES = ("popularity", "rating", "quickness", "simplicity")
+
+# Blend weights; override with RANKING_WEIGHTS="popularity=0.2,quickness=0" (all features at 0 is pure TF-IDF)
+DEFAULT_RANKING_WEIGHTS = {"similarity": 1.0, "popularity": 0.1, "rating": 0.05, "quickness": 0.02, "simplicity": 0.02}
+
+# Preparation time and ingredient count at which quickness and simplicity reach 0
+MAX_MINUTES = 24 * 60
+MAX_INGREDIENTS = 40
+
+
+def ranking_weights(spec=None):
+    """DEFAULT_RANKING_WEIGHTS updated with a 'name=weight,...' spec (default: the RANKING_WEIGHTS env var).
+
+    Unknown names and values that are not finite numbers are logged and keep the default.
+    """
+    spec = os.environ.get("RANKING_WEIGHTS", "") if spec is None else spec
+    weights = dict(DEFAULT_RANKING_WEIGHTS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in weights:
+            logger.warning("Ignoring unknown ranking weight: %s", name)
+            continue
+        try:
+            weight = float(value)
+        except ValueError:
+            weight = np.nan
+        if not np.isfinite(weight):
+            logger.warning("Ignoring invalid ranking weight %s=%r; using %s", name, value.strip(), weights[name])
+            continue
+        weights[name] = weight
+    return weights
+
+
+RANKING_WEIGHTS = ranking_weights()
+
+
+def recipe_features(recipes, interactions=None):
+    """(recipes, FEATURE_NAMES) float32 matrix aligned with the rows of `recipes`.
+
+    `interactions` is the output of `interactions.load_interaction_features`; recipes
+    without interactions get no popularity and the global mean rating.
+    """
+    features = np.zeros((len(recipes), len(FEATURE_NAMES)), dtype=np.float32)
+    if interactions is not None and len(interactions['recipe_id']):
+        positions = pd.Index(recipes['id']).get_indexer(interactions['recipe_id'])
+        found = positions >= 0
+        counts = np.zeros(len(recipes), dtype=np.float32)
+        counts[positions[found]] = interactions['count'][found]
+        features[:, 0] = np.log1p(counts) / np.log1p(max(counts.max(), 1))
+        ratings = np.full(len(recipes), interactions['global_rating'], dtype=np.float32)
+        ratings[positions[found]] = interactions['rating'][found]
+        features[:, 1] = ratings / 5
+    minutes = np.clip(np.nan_to_num(recipes['minutes'].to_numpy(np.float64), nan=MAX_MINUTES), 0, MAX_MINUTES)
+    features[:, 2] = 1 - np.log1p(minutes) / np.log1p(MAX_MINUTES)
+    n_ingredients = np.clip(np.nan_to_num(recipes['n_ingredients'].to_numpy(np.float64), nan=MAX_INGREDIENTS), 0, MAX_INGREDIENTS)
+    features[:, 3] = 1 - n_ingredients / MAX_INGREDIENTS
+    return features
+
+
+def feature_prior(features, weights=RANKING_WEIGHTS):
+    """Weighted sum of each recipe's features; computed once per model, read with one gather per query."""
+    return features @ np.array([weights[name] for name in FEATURE_NAMES], dtype=np.float32)
+
+
+def blend_scores(similarity_scores, prior, row_ids, weights=RANKING_WEIGHTS):
+    """Hybrid score of the candidates `row_ids`: weighted similarity plus their feature prior."""
+    if prior is None:
+        return similarity_scores
+    return weights["similarity"] * similarity_scores + prior[row_ids]
@@ -0,0 +1,156 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from recipe_store import as_list
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Split free text (or a list of strings) into the lowercase word tokens used by the index."""
+    if isinstance(text, (list, tuple)):
+        text = " ".join(map(str, text))
+    if not isinstance(text, str):
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _normalize(phrase):
+    return " ".join(str(phrase).lower().split())
+
+
+class PhrasePostings:
+    """Sorted row-id postings per distinct phrase (one ingredient, or one tag), in CSR layout.
+
+    The rows of phrase `i` are `rows[offsets[i]:offsets[i + 1]]`. A term matches every
+    phrase that contains it as a substring, like the `str.contains` filters this index
+    replaces: "egg" matches "eggs", "nut" matches "walnuts", and "olive oil" matches
+    "extra virgin olive oil" but not a recipe with "olive" and "vegetable oil".
+    """
+
+    def __init__(self, phrases, offsets, rows):
+        self.phrases = list(phrases)
+        self.offsets = offsets
+        self.rows = rows
+        # The vocabulary as one string, so matching a term against every phrase is one C-level scan
+        self._text = "\n".join(self.phrases)
+        lengths = np.fromiter((len(phrase) + 1 for phrase in self.phrases), dtype=np.int64, count=len(self.phrases))
+        self._starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(self.phrases) else lengths
+
+    @classmethod
+    def build(cls, values):
+        """Postings of `values`, one iterable of phrases per row."""
+        exploded = pd.Series(list(values), dtype=object).explode().dropna()
+        raw_codes, raw_phrases = pd.factorize(exploded)
+        # Normalize each distinct spelling once; spellings that normalize alike share a phrase, empty ones get -1
+        phrase_codes, phrases = pd.factorize(pd.Series([_normalize(p) or None for p in raw_phrases], dtype=object))
+        pair_phrases = phrase_codes[raw_codes]
+        keep = pair_phrases >= 0
+        pair_phrases, pair_rows = pair_phrases[keep].astype(np.int64), exploded.index.to_numpy(np.int64)[keep]
+        # One sorted key per (phrase, row) pair groups the rows by phrase and drops repeats
+        n_rows = int(pair_rows.max(initial=0)) + 1
+        keys = np.sort(pair_phrases * n_rows + pair_rows)
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) else keys
+        offsets = np.zeros(len(phrases) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n_rows, minlength=len(phrases)), out=offsets[1:])
+        return cls(list(phrases), offsets, (keys % n_rows).astype(np.int32))
+
+    def save(self, directory, name):
+        """Write `index_<name>.txt` (one phrase per line) and the offsets/rows arrays."""
+        with open(os.path.join(directory, f'index_{name}.txt'), 'w', encoding='utf-8') as f:
+            f.write("".join(phrase + "\n" for phrase in self.phrases))
+        np.save(os.path.join(directory, f'index_{name}_offsets.npy'), np.asarray(self.offsets, dtype=np.int64))
+        np.save(os.path.join(directory, f'index_{name}_rows.npy'), np.asarray(self.rows, dtype=np.int32))
+
+    @classmethod
+    def load(cls, directory, name):
+        """Postings saved by `save`, with the arrays memory-mapped; None when absent."""
+        if not os.path.exists(os.path.join(directory, f'index_{name}_rows.npy')):
+            return None
+        with open(os.path.join(directory, f'index_{name}.txt'), encoding='utf-8') as f:
+            phrases = f.read().split("\n")[:-1]
+        return cls(
+            phrases,
+            np.load(os.path.join(directory, f'index_{name}_offsets.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, f'index_{name}_rows.npy'), mmap_mode='r'),
+        )
+
+    def phrase_ids(self, term):
+        """Ids of the phrases containing `term`."""
+        starts = [match.start() for match in re.finditer(re.escape(term), self._text)]
+        return np.unique(np.searchsorted(self._starts, starts, side='right') - 1)
+
+    def lookup(self, term):
+        """Sorted rows with a phrase containing `term`, or None for an empty term."""
+        term = _normalize(term)
+        if not term:
+            return None
+        ids = self.phrase_ids(term)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int32)
+        if len(ids) == 1:
+            return np.asarray(self.rows[self.offsets[ids[0]]:self.offsets[ids[0] + 1]])
+        # Gather every matching posting list at once and union them through a row mask
+        starts, ends = self.offsets[ids], self.offsets[ids + 1]
+        lengths = ends - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        matched = self.rows[positions]
+        mask = np.zeros(int(matched.max()) + 1, dtype=bool)
+        mask[matched] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+
+class InvertedIndex:
+    """Phrase -> sorted row-id postings for the `tags_cleaned` and `ingredients` columns.
+
+    Row ids are positions in the recipes DataFrame (and rows of the TF-IDF matrix),
+    so filters become set intersections/differences instead of string scans.
+    """
+
+    def __init__(self, tag_postings, ingredient_postings, n_rows):
+        self.tag_postings = tag_postings
+        self.ingredient_postings = ingredient_postings
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_recipes(cls, recipes):
+        return cls(
+            PhrasePostings.build(recipes['tags_cleaned'].fillna("").astype(str).str.split()),
+            PhrasePostings.build(as_list(value) for value in recipes['ingredients']),
+            len(recipes),
+        )
+
+    def save(self, directory):
+        self.tag_postings.save(directory, 'tags')
+        self.ingredient_postings.save(directory, 'ingredients')
+
+    @classmethod
+    def load(cls, directory, n_rows):
+        """Index saved by `save` for `n_rows` recipes, or None when the artifacts predate it."""
+        tag_postings = PhrasePostings.load(directory, 'tags')
+        ingredient_postings = PhrasePostings.load(directory, 'ingredients')
+        if tag_postings is None or ingredient_postings is None:
+            return None
+        return cls(tag_postings, ingredient_postings, n_rows)
+
+    def filter(self, tags=(), included=(), excluded=()):
+        """Return sorted row ids matching all `tags` and `included` ingredients and none of `excluded`."""
+        rows = None
+        terms = [(self.tag_postings, t) for t in tags] + [(self.ingredient_postings, i) for i in included]
+        for postings, term in terms:
+            matches = postings.lookup(term)
+            if matches is None:
+                continue
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+            if rows.size == 0:
+                return rows
+        if rows is None:
+            rows = np.arange(self.n_rows, dtype=np.int32)
+        for term in excluded:
+            matches = self.ingredient_postings.lookup(term)
+            if matches is not None and matches.size:
+                rows = np.setdiff1d(rows, matches, assume_unique=True)
+        return rows
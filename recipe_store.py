@@ -0,0 +1,57 @@
+import ast
+import os
+
+import pandas as pd
+
+RECIPES_CSV = 'preprocessed_recipes.csv'
+RECIPES_PARQUET = 'preprocessed_recipes.parquet'
+
+# Columns the raw dataset stores as Python list literals
+LIST_COLUMNS = ['tags', 'nutrition', 'steps', 'ingredients']
+
+
+def as_list(value):
+    """Return a list column value as a list, parsing legacy string literals safely."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+        return list(parsed) if isinstance(parsed, (list, tuple)) else []
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return []
+    return list(value)
+
+
+def parse_list_columns(recipes):
+    """Parse every present list column of `recipes` in place with `ast.literal_eval`."""
+    for column in LIST_COLUMNS:
+        if column in recipes.columns:
+            recipes[column] = [as_list(value) for value in recipes[column]]
+    return recipes
+
+
+def save_recipe_store(recipes, path=RECIPES_PARQUET):
+    """Write `recipes` as Parquet with the list columns stored as native list columns."""
+    recipes = parse_list_columns(recipes.copy())
+    recipes.to_parquet(path, index=False)
+
+
+def load_recipe_store(path=RECIPES_PARQUET, csv_path=RECIPES_CSV):
+    """Load the recipe metadata; list column values are read as Python lists.
+
+    Reads the Parquet store when it exists and falls back to parsing the CSV once.
+    Parquet list columns stay Arrow-backed, so a value is only converted to a list
+    when it is read, not for every row at load time.
+    """
+    if not os.path.exists(path):
+        return parse_list_columns(pd.read_csv(csv_path))
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    def list_columns_as_arrow(type_):
+        return pd.ArrowDtype(type_) if pa.types.is_list(type_) or pa.types.is_large_list(type_) else None
+
+    return pq.read_table(path).to_pandas(types_mapper=list_columns_as_arrow)
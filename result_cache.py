@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = 4096
+RESULT_CACHE_TTL = 3600
+
+
+def canonical_terms(terms):
+    """Lowercased, stripped, deduplicated and sorted copy of `terms`."""
+    return tuple(sorted({str(term).strip().lower() for term in terms if term and str(term).strip()}))
+
+
+def make_key(preferences=(), included=(), excluded=(), additional_prefs=""):
+    """Cache key for a query; equal for any ordering, casing or repetition of the same terms."""
+    return (
+        canonical_terms(preferences),
+        canonical_terms(included),
+        canonical_terms(excluded),
+        " ".join(str(additional_prefs or "").lower().split()),
+    )
+
+
+class ResultCache:
+    """Thread-safe LRU cache with per-entry TTL for ranked recommendation results."""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry, e.g. after the model artifacts have been reloaded."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+import time
+
+SELECTIONS_DB_PATH = os.environ.get("SELECTIONS_DB_PATH", "selected_recipes.sqlite3")
+
+
+class SelectionStore:
+    """Per-user selected recipe ids in SQLite.
+
+    Only ids are stored; callers look the recipes up in the recipe store. Each
+    `apply` is one transaction, so a rerun's changes land together or not at all,
+    and concurrent sessions never overwrite each other's rows.
+    """
+
+    def __init__(self, path=SELECTIONS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS selections ("
+            "user_id TEXT NOT NULL, recipe_id INTEGER NOT NULL, selected_at REAL NOT NULL, "
+            "PRIMARY KEY (user_id, recipe_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get(self, user_id):
+        """The user's selected recipe ids, in the order they were selected."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recipe_id FROM selections WHERE user_id = ? ORDER BY selected_at, recipe_id", (user_id,)
+            ).fetchall()
+        return [recipe_id for recipe_id, in rows]
+
+    def apply(self, user_id, added=(), removed=()):
+        """Add and remove selections for `user_id` in one transaction."""
+        added, removed = [int(r) for r in added], [int(r) for r in removed]
+        if not added and not removed:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM selections WHERE user_id = ? AND recipe_id = ?", [(user_id, r) for r in removed]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO selections (user_id, recipe_id, selected_at) VALUES (?, ?, ?)",
+                [(user_id, r, now + i * 1e-6) for i, r in enumerate(added)],
+            )
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_selection_store():
+    """Process-wide store on SELECTIONS_DB_PATH, opened on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SelectionStore()
+        return _default_store
@@ -0,0 +1,185 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from recipe_index import tokenize
+
+# Healthier alternatives offered to everyone
+BASE_SUBSTITUTIONS = {
+    "sugar": "honey",
+    "white sugar": "honey",
+    "brown sugar": "honey",
+    "butter": "olive oil",
+    "margarine": "avocado oil",
+    "salt": "herbs or potassium salt",
+    "flour": "almond flour",
+    "white flour": "whole wheat flour",
+    "pasta": "zucchini noodles",
+    "rice": "quinoa",
+    "bread": "whole grain bread",
+    "cheese": "low-fat cheese",
+    "milk": "almond milk",
+    "cream": "coconut cream",
+    "mayonnaise": "greek yogurt",
+    "sour cream": "cottage cheese",
+    "red meat": "lean chicken or fish",
+    "fried food": "grilled alternative",
+}
+
+# Rules layered over the base table per health condition, in this order
+CONDITION_SUBSTITUTIONS = {
+    "Diabetes": {
+        "sugar": "stevia",
+        "white sugar": "stevia",
+        "brown sugar": "stevia",
+        "honey": "monk fruit sweetener",
+        "white bread": "whole grain bread",
+        "pasta": "chickpea pasta",
+        "rice": "cauliflower rice",
+    },
+    "Heart Condition": {
+        "butter": "olive oil",
+        "margarine": "avocado oil",
+        "salt": "herbs or potassium salt",
+        "fried food": "baked or grilled food",
+    },
+}
+HEALTH_CONDITIONS = list(CONDITION_SUBSTITUTIONS)
+# Condition sets whose substitutions are precomputed per recipe: every combination, while there are few
+COMMON_CONDITION_SETS = [
+    conditions for size in range(len(HEALTH_CONDITIONS) + 1)
+    for conditions in itertools.combinations(HEALTH_CONDITIONS, size)
+]
+
+# Ingredients that end in a rule's last word (butter, milk, cream, flour, ...) but are a
+# different thing; left unchanged. A keep also covers longer names ending in it
+# ("sweetened condensed milk", "vanilla ice cream").
+KEEP_INGREDIENTS = [
+    "peanut butter", "almond butter", "cashew butter", "coconut butter", "apple butter", "cocoa butter",
+    "coconut milk", "soy milk", "rice milk", "oat milk", "evaporated milk", "condensed milk",
+    "ice cream", "rice flour", "coconut flour",
+]
+
+_MATCH = None  # trie key holding the replacement of the words leading to a node
+
+
+class SubstitutionEngine:
+    """Ingredient substitutions compiled into a trie over reversed word tokens.
+
+    An ingredient is matched from its last word (the food it names, e.g. "butter"
+    in "unsalted butter") towards its first, and the longest matching rule decides:
+    "granulated white sugar" uses the "white sugar" rule, "peanut butter" the keep
+    rule for "peanut butter". A matched ingredient is replaced as a whole. Results
+    are memoized per ingredient string, so a page (or a whole catalog) costs one
+    trie walk per distinct ingredient.
+    """
+
+    def __init__(self, rules, keep=KEEP_INGREDIENTS):
+        self.trie = {}
+        # Substitutes are never substituted again (unless a rule says otherwise)
+        entries = [(phrase, None) for phrase in list(keep) + list(rules.values())] + list(rules.items())
+        for phrase, replacement in entries:
+            node = self.trie
+            for token in reversed(tokenize(phrase)):
+                node = node.setdefault(token, {})
+            node[_MATCH] = replacement
+        self._memo = {}
+
+    def substitute_one(self, ingredient):
+        """Replacement for one ingredient, or the ingredient itself when no rule applies."""
+        result = self._memo.get(ingredient)
+        if result is None:
+            node, replacement = self.trie, None
+            for token in reversed(tokenize(ingredient)):
+                node = node.get(token)
+                if node is None:
+                    break
+                if _MATCH in node:
+                    replacement = node[_MATCH]
+            result = replacement or ingredient
+            self._memo[ingredient] = result
+        return result
+
+    def substitute(self, ingredients):
+        return [self.substitute_one(ingredient) for ingredient in ingredients]
+
+    def substitute_batch(self, ingredient_lists):
+        """`substitute` for every ingredient list of a result page, in order."""
+        return [self.substitute(ingredients) for ingredients in ingredient_lists]
+
+    def warm(self, ingredients):
+        """Precompute the substitutions of `ingredients` (e.g. the catalog's distinct ingredients)."""
+        for ingredient in ingredients:
+            self.substitute_one(ingredient)
+        return self
+
+
+def condition_rules(health_conditions):
+    """Base substitutions with each selected condition's rules layered on top."""
+    rules = dict(BASE_SUBSTITUTIONS)
+    for condition in HEALTH_CONDITIONS:
+        if condition in health_conditions:
+            rules.update(CONDITION_SUBSTITUTIONS[condition])
+    return rules
+
+
+@lru_cache(maxsize=None)
+def _engine_for(conditions):
+    return SubstitutionEngine(condition_rules(conditions))
+
+
+def get_substitution_engine(health_conditions=()):
+    """Shared engine for a set of health conditions, compiled on first use."""
+    return _engine_for(tuple(condition for condition in HEALTH_CONDITIONS if condition in health_conditions))
+
+
+class RecipeSubstitutions:
+    """Substitutions of every recipe of a catalog, precomputed for COMMON_CONDITION_SETS.
+
+    Only changed ingredients are stored, per condition set and in CSR layout: the
+    changes of row `r` are `positions[offsets[r]:offsets[r + 1]]` (indexes into its
+    ingredient list) with the matching ids into `replacements`. Each distinct
+    ingredient goes through the engine once, which also warms the engines' memos.
+    """
+
+    def __init__(self, ingredients_column, condition_sets=COMMON_CONDITION_SETS):
+        exploded = pd.Series(ingredients_column).reset_index(drop=True).explode()
+        rows = exploded.index.to_numpy(np.int64)
+        positions = exploded.groupby(level=0).cumcount().to_numpy(np.int32)
+        codes, distinct = pd.factorize(exploded)
+        self.n_rows = len(ingredients_column)
+        self.replacements = []
+        replacement_ids = {}
+        self.changes = {}
+        for conditions in condition_sets:
+            engine = get_substitution_engine(conditions)
+            targets = np.full(len(distinct) + 1, -1, dtype=np.int32)
+            for code, ingredient in enumerate(distinct):
+                replacement = engine.substitute_one(ingredient)
+                if replacement != ingredient:
+                    if replacement not in replacement_ids:
+                        replacement_ids[replacement] = len(self.replacements)
+                        self.replacements.append(replacement)
+                    targets[code] = replacement_ids[replacement]
+            # Missing values (code -1) read the trailing -1
+            pair_targets = targets[codes]
+            changed = pair_targets >= 0
+            offsets = np.zeros(self.n_rows + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows[changed], minlength=self.n_rows), out=offsets[1:])
+            self.changes[tuple(conditions)] = (offsets, positions[changed], pair_targets[changed])
+
+    def substitute_page(self, row_ids, ingredient_lists, health_conditions=()):
+        """Substituted ingredient lists of a page of recipes (rows `row_ids`, lists in the same order)."""
+        conditions = tuple(condition for condition in HEALTH_CONDITIONS if condition in health_conditions)
+        if conditions not in self.changes:
+            return get_substitution_engine(conditions).substitute_batch(ingredient_lists)
+        offsets, positions, targets = self.changes[conditions]
+        page = []
+        for row, ingredients in zip(row_ids, ingredient_lists):
+            ingredients = list(ingredients)
+            for change in range(offsets[row], offsets[row + 1]):
+                ingredients[positions[change]] = self.replacements[targets[change]]
+            page.append(ingredients)
+        return page
@@ -0,0 +1,51 @@
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ann_index import IVFIndex, ann_rank, exact_cosine, recall_report
+from benchmark import synthetic_recipes
+from ranking import blend_scores, feature_prior, recipe_features
+
+
+def build(n_rows=150):
+    recipes = synthetic_recipes(n_rows, seed=3)
+    vectorizer = TfidfVectorizer(stop_words='english')
+    tfidf_matrix = vectorizer.fit_transform(recipes['text_data'])
+    svd = TruncatedSVD(n_components=10, random_state=0).fit(tfidf_matrix)
+    return recipes, vectorizer, tfidf_matrix, IVFIndex.build(tfidf_matrix, svd, n_lists=4)
+
+
+def test_ann_rank_blends_the_prior_like_the_exact_path():
+    recipes, vectorizer, tfidf_matrix, index = build()
+    prior = feature_prior(recipe_features(recipes))
+    allowed = np.arange(0, len(recipes), 2)
+    query = vectorizer.transform(["vegetarian italian"])
+
+    # Probing every list retrieves every allowed row, so only the re-ranking is compared
+    ranked = ann_rank(query, tfidf_matrix, index, allowed, 10, nprobe=4, prior=prior)
+
+    expected = allowed[np.argsort(-blend_scores(exact_cosine(query, tfidf_matrix, allowed), prior, allowed), kind='stable')]
+    np.testing.assert_array_equal(ranked, expected)
+
+
+def test_ann_rank_without_prior_orders_by_cosine():
+    recipes, vectorizer, tfidf_matrix, index = build()
+    allowed = np.arange(len(recipes))
+    query = vectorizer.transform(["spicy mexican"])
+
+    ranked = ann_rank(query, tfidf_matrix, index, allowed, 10, nprobe=4)
+
+    scores = exact_cosine(query, tfidf_matrix, ranked)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_recall_report_includes_blended_overlap():
+    recipes, vectorizer, tfidf_matrix, index = build()
+    prior = feature_prior(recipe_features(recipes))
+
+    report = recall_report(vectorizer, tfidf_matrix, index, ["vegetarian italian", "spicy mexican"], k=5, nprobes=(4,), prior=prior)
+
+    # Every list is probed, so both rankings are exact
+    assert report['ann'][0]['recall'] == 1.0
+    assert report['ann'][0]['blended_recall'] == 1.0
+    assert 'blended_recall' not in recall_report(vectorizer, tfidf_matrix, index, ["vegetarian"], k=5, nprobes=(4,))['ann'][0]
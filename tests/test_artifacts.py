@@ -0,0 +1,31 @@
+import os
+
+from artifacts import current_version, publish_version
+
+
+def make_versions(root, names):
+    for name in names:
+        os.makedirs(os.path.join(root, 'versions', name))
+
+
+def test_publish_prunes_older_versions_only(tmp_path):
+    root = str(tmp_path)
+    make_versions(root, ['20260101T000000-a', '20260102T000000-b', '20260103T000000-c', '20260104T000000-d'])
+    # A newer build that is still being written
+    make_versions(root, ['20260105T000000-e'])
+
+    publish_version(os.path.join(root, 'versions', '20260104T000000-d'), root, keep=2)
+
+    assert current_version(root) == '20260104T000000-d'
+    assert sorted(os.listdir(os.path.join(root, 'versions'))) == [
+        '20260103T000000-c', '20260104T000000-d', '20260105T000000-e',
+    ]
+
+
+def test_publish_keep_one_leaves_only_published_and_newer(tmp_path):
+    root = str(tmp_path)
+    make_versions(root, ['20260101T000000-a', '20260102T000000-b', '20260103T000000-c'])
+
+    publish_version(os.path.join(root, 'versions', '20260102T000000-b'), root, keep=1)
+
+    assert sorted(os.listdir(os.path.join(root, 'versions'))) == ['20260102T000000-b', '20260103T000000-c']
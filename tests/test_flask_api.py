@@ -0,0 +1,87 @@
+import importlib
+import logging
+import os
+
+import pytest
+
+from benchmark import build_corpus
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    """flask_api loaded on a synthetic corpus published to ./artifacts of a scratch directory."""
+    directory = tmp_path_factory.mktemp('api')
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        build_corpus(500, 'artifacts')
+        import flask_api
+        flask_api = importlib.reload(flask_api)
+        yield flask_api
+    finally:
+        os.chdir(previous)
+
+
+@pytest.fixture
+def client(api, monkeypatch):
+    # Never scrape food.com from the tests
+    monkeypatch.setattr(api, 'fetch_posters', lambda items, *args, **kwargs: [None] * len(items))
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'preference': 'vegetarian', 'top_k': 'abc'}, "'top_k' must be an integer."),
+    ({'preference': 'vegetarian', 'offset': 'x'}, "'offset' must be an integer."),
+    ({'preference': 'vegetarian', 'top_k': 2.5}, "'top_k' must be an integer."),
+    ({'preference': 'vegetarian', 'top_k': 0}, "'top_k' must be positive and 'offset' must not be negative."),
+])
+def test_invalid_paging_is_a_bad_request(client, body, message):
+    response = client.post('/recommend', json=body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': message}
+
+
+def test_offset_past_the_end_returns_an_empty_page(client):
+    total = int(client.post('/recommend', json={'preference': 'vegetarian', 'top_k': 1}).headers['X-Total-Count'])
+
+    last = client.post('/recommend', json={'preference': 'vegetarian', 'offset': total - 1, 'top_k': 5})
+    past = client.post('/recommend', json={'preference': 'vegetarian', 'offset': total + 10})
+
+    assert len(last.get_json()) == 1
+    assert past.status_code == 200
+    assert past.get_json() == []
+    assert past.headers['X-Total-Count'] == str(total)
+
+
+def test_no_matches_is_not_found(client):
+    response = client.post('/recommend', json={'preference': 'no-such-tag', 'offset': 20})
+
+    assert response.status_code == 404
+
+
+def test_health_conditions_add_substituted_ingredients(client):
+    plain = client.post('/recommend', json={'preference': 'vegetarian', 'top_k': 5}).get_json()
+    response = client.post('/recommend', json={'preference': 'vegetarian', 'top_k': 5, 'health_conditions': ['Diabetes']})
+    unknown = client.post('/recommend', json={'preference': 'vegetarian', 'health_conditions': ['Flu']})
+
+    recipes = response.get_json()
+    assert 'substituted_ingredients' not in plain[0]
+    assert [recipe['ingredients'] for recipe in recipes] == [recipe['ingredients'] for recipe in plain]
+    assert all(len(recipe['substituted_ingredients']) == len(recipe['ingredients']) for recipe in recipes)
+    assert unknown.status_code == 400
+
+
+def test_failed_reload_is_logged_and_counted(api, monkeypatch, caplog):
+    failures = api.metrics.ARTIFACT_RELOAD_FAILURES.snapshot().get((), 0)
+    monkeypatch.setattr(api, 'current_version', lambda: 'unpublished')
+
+    def broken_reload():
+        raise OSError("missing artifacts")
+
+    monkeypatch.setattr(api, 'reload_models', broken_reload)
+    with caplog.at_level(logging.ERROR, logger='flask_api'):
+        api._reload_in_background()
+
+    assert api.metrics.ARTIFACT_RELOAD_FAILURES.snapshot()[()] == failures + 1
+    assert caplog.records[-1].getMessage() == "Error reloading artifacts"
@@ -0,0 +1,43 @@
+import ast
+
+import numpy as np
+
+from artifacts import resolve_artifacts_dir
+from benchmark import build_corpus, synthetic_recipes
+from ingest import RECIPE_COLUMNS, ingest
+from nutrition import load_nutrition
+
+
+def raw_rows(n_rows, id_offset):
+    """Rows in RAW_recipes.csv format: list columns as string literals."""
+    raw = synthetic_recipes(n_rows, seed=7)[RECIPE_COLUMNS].copy()
+    raw['id'] += id_offset
+    for column in ('tags', 'nutrition', 'steps', 'ingredients'):
+        raw[column] = raw[column].map(lambda value: str(list(value)))
+    return raw
+
+
+def test_ingest_keeps_the_nutrition_of_existing_recipes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / 'artifacts')
+    build_corpus(300, root)
+    before = np.array(load_nutrition(resolve_artifacts_dir(root)))
+    new = raw_rows(5, 10_000_000)
+
+    version_dir = ingest(new, root)
+
+    after = np.array(load_nutrition(version_dir))
+    assert after.shape == (305, 7)
+    np.testing.assert_array_equal(after[:300], before)
+    assert not (before == 0).all(axis=1).any()
+    expected = np.array([ast.literal_eval(value) for value in new['nutrition']], dtype=np.float32)
+    np.testing.assert_allclose(after[300:], expected)
+
+
+def test_ingest_skips_known_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / 'artifacts')
+    build_corpus(50, root)
+
+    assert ingest(raw_rows(3, 10_000_000), root) is not None
+    assert ingest(raw_rows(3, 10_000_000), root) is None
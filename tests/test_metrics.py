@@ -0,0 +1,52 @@
+import multiprocessing
+
+import metrics
+
+
+def make_registry(directory=None):
+    registry = metrics.Registry(directory)
+    requests = registry.counter("test_requests_total", "Requests.", ("endpoint",))
+    latency = registry.histogram("test_seconds", "Latency.", buckets=(0.1, 1))
+    return registry, requests, latency
+
+
+def serve_in_worker(registry, requests, latency, count):
+    for _ in range(count):
+        requests.inc(endpoint="/recommend")
+        latency.observe(0.5)
+    registry.write_snapshot()
+
+
+def test_render_without_directory_reads_this_process_only():
+    registry, requests, latency = make_registry()
+    requests.inc(endpoint="/recommend")
+    latency.observe(0.05)
+
+    text = registry.render()
+
+    assert 'test_requests_total{endpoint="/recommend"} 1' in text
+    assert 'test_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_seconds_count 1' in text
+
+
+def test_render_sums_every_worker(tmp_path):
+    registry, requests, latency = make_registry(str(tmp_path))
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=serve_in_worker, args=(registry, requests, latency, n)) for n in (2, 3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    requests.inc(endpoint="/recommend")
+    requests.inc(endpoint="/similar")
+    latency.observe(2)
+
+    text = registry.render()
+
+    assert 'test_requests_total{endpoint="/recommend"} 6' in text
+    assert 'test_requests_total{endpoint="/similar"} 1' in text
+    assert 'test_seconds_bucket{le="0.1"} 0' in text
+    assert 'test_seconds_bucket{le="1"} 5' in text
+    assert 'test_seconds_bucket{le="+Inf"} 6' in text
+    assert 'test_seconds_sum 4.5' in text
+    assert len(list(tmp_path.glob("metrics_*.json"))) == 3
@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+from artifacts import current_version, publish_version
+from benchmark import build_corpus
+from model_loader import ModelArtifacts
+
+
+def test_loads_the_requested_version_not_the_current_one(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root, other_root = str(tmp_path / 'artifacts'), str(tmp_path / 'other')
+    build_corpus(50, root, seed=1)
+    first = current_version(root)
+    # A newer version with more recipes becomes the current one
+    build_corpus(80, other_root, seed=2)
+    second = current_version(other_root)
+    os.rename(os.path.join(other_root, 'versions', second), os.path.join(root, 'versions', second))
+    publish_version(os.path.join(root, 'versions', second), root, keep=2)
+
+    model = ModelArtifacts(first, root)
+
+    assert current_version(root) == second
+    assert model.version == first
+    assert len(model.recipes) == model.tfidf_matrix.shape[0] == model.nutrition.shape[0] == 50
+    assert len(ModelArtifacts(second, root).recipes) == 80
+
+
+def test_loaded_index_and_prior_cover_every_recipe(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = str(tmp_path / 'artifacts')
+    build_corpus(60, root)
+
+    model = ModelArtifacts(current_version(root), root)
+
+    assert model.recipe_index.n_rows == len(model.recipes) == len(model.ranking_prior)
+    np.testing.assert_array_equal(model.recipe_positions.get_indexer(model.recipes['id']), np.arange(60))
+    assert model.tfidf_columns.shape == model.tfidf_matrix.shape
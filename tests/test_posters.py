@@ -0,0 +1,138 @@
+import logging
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+import metrics
+import posters
+from benchmark import start_stub_poster_server
+from posters import PosterCache, fetch_poster, fetch_posters, prefetch_posters, start_poster_fetches
+
+NO_IMAGE_PAGE = '<html><body>No photo yet</body></html>'
+
+
+@pytest.fixture(scope='module')
+def stub_server():
+    server = start_stub_poster_server({
+        2: (404, ''), 3: (200, NO_IMAGE_PAGE), 4: (429, ''), 5: (503, ''), 6: (403, ''),
+    })
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path, stub_server, monkeypatch):
+    monkeypatch.setattr(posters, 'POSTER_BASE_URL', f'http://127.0.0.1:{stub_server.server_address[1]}/recipe')
+    cache = PosterCache(str(tmp_path / 'posters.sqlite3'), ttl=100, negative_ttl=10)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(posters.time, 'time', lambda: now[0])
+    return now
+
+
+def test_found_poster_is_cached(cache):
+    assert fetch_poster('pasta', 1, cache, scrape_on_miss=True) == 'http://posters.invalid/1.jpg'
+    assert cache.get(1) == (True, 'http://posters.invalid/1.jpg')
+
+
+@pytest.mark.parametrize('recipe_id', [2, 3])
+def test_missing_poster_is_cached_as_negative(cache, recipe_id):
+    assert fetch_poster('pasta', recipe_id, cache, scrape_on_miss=True) is None
+    assert cache.get(recipe_id) == (True, None)
+
+
+@pytest.mark.parametrize('recipe_id', [4, 5, 6])
+def test_errors_are_not_cached(cache, recipe_id):
+    assert fetch_poster('pasta', recipe_id, cache, scrape_on_miss=True) is None
+    assert cache.get(recipe_id) == (False, None)
+
+
+def test_page_fetch_caches_only_definite_results(cache):
+    urls = fetch_posters([('pasta', recipe_id) for recipe_id in range(1, 7)], cache, deadline=10, scrape_on_miss=True)
+    assert urls == ['http://posters.invalid/1.jpg', None, None, None, None, None]
+    assert [cache.get(recipe_id)[0] for recipe_id in range(1, 7)] == [True, True, True, False, False, False]
+
+
+def test_prefetch_does_not_cache_errors(cache):
+    recipes = {'name': ['pasta'] * 6, 'id': list(range(1, 7))}
+    assert prefetch_posters(recipes, cache, workers=2) == (3, 6)
+    assert [cache.get(recipe_id)[0] for recipe_id in range(1, 7)] == [True, True, True, False, False, False]
+
+
+def test_scrape_errors_are_logged_and_counted(cache, caplog):
+    failures = metrics.POSTER_SCRAPE_FAILURES.snapshot().get((), 0)
+
+    with caplog.at_level(logging.WARNING, logger='posters'):
+        fetch_poster('pasta', 4, cache, scrape_on_miss=True)
+        prefetch_posters({'name': ['pasta'] * 2, 'id': [5, 6]}, cache, workers=2)
+
+    assert metrics.POSTER_SCRAPE_FAILURES.snapshot()[()] == failures + 3
+    assert sorted(record.getMessage() for record in caplog.records) == [
+        f"Error fetching poster for recipe pasta-{recipe_id}: {status} from "
+        f"{posters.POSTER_BASE_URL}/pasta-{recipe_id}"
+        for recipe_id, status in ((4, 429), (5, 503), (6, 403))
+    ]
+
+
+def test_poster_expires_after_ttl(cache, clock):
+    cache.set(1, 'http://posters.invalid/1.jpg')
+    clock[0] += 100
+    assert cache.get(1) == (True, 'http://posters.invalid/1.jpg')
+    clock[0] += 1
+    assert cache.get(1) == (False, None)
+
+
+def test_negative_entry_expires_after_negative_ttl(cache, clock):
+    cache.set(2, None)
+    clock[0] += 10
+    assert cache.get(2) == (True, None)
+    clock[0] += 1
+    assert cache.get(2) == (False, None)
+
+
+@pytest.fixture
+def slow_scrape(monkeypatch):
+    """Scrapes that block until released, recording each recipe id scraped."""
+    release, calls = threading.Event(), []
+
+    def scrape(recipe_name, recipe_id, session=None, timeout=None):
+        calls.append(recipe_id)
+        release.wait(10)
+        return f'http://posters.invalid/{recipe_id}.jpg'
+
+    monkeypatch.setattr(posters, 'scrape_poster', scrape)
+    yield release, calls
+    release.set()
+
+
+def test_in_flight_scrapes_are_joined(cache, slow_scrape):
+    release, calls = slow_scrape
+    page = [('pasta', 11), ('pasta', 12), ('pasta', 11)]
+
+    assert fetch_posters(page, cache, deadline=0.05, scrape_on_miss=True) == [None, None, None]
+    _, futures = start_poster_fetches(page, cache, scrape_on_miss=True)
+    release.set()
+    wait(futures, timeout=5)
+
+    assert sorted(calls) == [11, 12]
+    assert sorted(futures.values()) == [[0, 2], [1]]
+    assert fetch_posters(page, cache, scrape_on_miss=True) == [f'http://posters.invalid/{i}.jpg' for i in (11, 12, 11)]
+
+
+def test_misses_beyond_the_backlog_are_not_scraped(cache, slow_scrape, monkeypatch):
+    release, calls = slow_scrape
+    monkeypatch.setattr(posters, 'POSTER_MAX_PENDING', 2)
+
+    _, futures = start_poster_fetches([('pasta', recipe_id) for recipe_id in (21, 22, 23, 24)], cache, scrape_on_miss=True)
+    release.set()
+    wait(futures, timeout=5)
+
+    assert sorted(positions for positions in futures.values()) == [[0], [1]]
+    assert sorted(calls) == [21, 22]
+    assert [cache.get(recipe_id)[0] for recipe_id in (21, 22, 23, 24)] == [True, True, False, False]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from query_encoder import QueryEncoder, check_parity, make_query_encoder
+
+CORPUS = [
+    "vegetarian italian pasta with tomato tomato basil",
+    "Spicy Mexican chicken tacos, lime and cilantro",
+    "crème brûlée with vanilla bean",
+    "café au lait and a croissant",
+    "gluten-free low-sodium chicken soup",
+    "vegan chocolate cake chocolate frosting",
+    "Chicken CHICKEN rice bowl",
+    "30-minutes-or-less tomato soup",
+]
+
+QUERIES = [
+    "", " ", "the and of", "tomato", "Tomato tomato TOMATO basil", "creme brulee", "crème brûlée",
+    "café", "gluten-free chicken", "chicken\tsoup\nrice", "unknown words only", "30-minutes-or-less",
+    "Chicken chicken chicken", "vegan!!! chocolate??",
+]
+
+SETTINGS = {
+    'default': {},
+    'sublinear': {'sublinear_tf': True},
+    'binary_l1': {'binary': True, 'norm': 'l1'},
+    'no_norm': {'norm': None},
+    'strip_accents_unicode': {'strip_accents': 'unicode'},
+    'strip_accents_ascii': {'strip_accents': 'ascii'},
+    'no_idf': {'use_idf': False},
+    'case_sensitive': {'lowercase': False},
+    'stop_words': {'stop_words': 'english'},
+    'capture_group': {'token_pattern': r"(?u)\b(\w+)(?:-\w+)*\b"},
+}
+
+
+@pytest.mark.parametrize('params', SETTINGS.values(), ids=SETTINGS.keys())
+def test_transform_matches_vectorizer(params):
+    vectorizer = TfidfVectorizer(**params).fit(CORPUS)
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+
+    assert check_parity(vectorizer, encoder, QUERIES + CORPUS) < 1e-12
+
+
+def test_transform_of_no_texts_is_empty():
+    vectorizer = TfidfVectorizer().fit(CORPUS)
+
+    assert QueryEncoder.from_vectorizer(vectorizer).transform([]).shape == (0, len(vectorizer.vocabulary_))
+
+
+@pytest.mark.parametrize('params', [
+    {'ngram_range': (1, 2)},
+    {'analyzer': 'char'},
+    {'tokenizer': str.split, 'token_pattern': None},
+    {'preprocessor': str.upper},
+    {'strip_accents': lambda text: text},
+], ids=['ngrams', 'char_analyzer', 'tokenizer', 'preprocessor', 'callable_strip_accents'])
+def test_make_query_encoder_falls_back_to_vectorizer(params):
+    vectorizer = TfidfVectorizer(**params).fit(CORPUS)
+
+    with pytest.raises(ValueError):
+        QueryEncoder.from_vectorizer(vectorizer)
+    assert make_query_encoder(vectorizer) is vectorizer
+
+
+def test_make_query_encoder_uses_encoder_when_supported():
+    vectorizer = TfidfVectorizer(sublinear_tf=True).fit(CORPUS)
+    encoder = make_query_encoder(vectorizer)
+
+    assert isinstance(encoder, QueryEncoder)
+    np.testing.assert_allclose(encoder.transform(["chicken soup"]).toarray(), vectorizer.transform(["chicken soup"]).toarray())
@@ -0,0 +1,27 @@
+import logging
+
+import numpy as np
+
+from ranking import DEFAULT_RANKING_WEIGHTS, ranking_weights, top_k_indices
+
+
+def test_ranking_weights_override_the_defaults():
+    weights = ranking_weights("popularity=0.2, quickness=0")
+
+    assert weights == {**DEFAULT_RANKING_WEIGHTS, "popularity": 0.2, "quickness": 0.0}
+
+
+def test_bad_ranking_weights_are_logged_and_keep_the_default(caplog):
+    with caplog.at_level(logging.WARNING, logger='ranking'):
+        weights = ranking_weights("popularity=high,rating=nan,freshness=1,simplicity=0.5")
+
+    assert weights == {**DEFAULT_RANKING_WEIGHTS, "simplicity": 0.5}
+    assert len(caplog.records) == 3
+
+
+def test_top_k_indices_orders_only_the_page():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 2, offset=2).tolist() == [2, 4]
+    assert top_k_indices(scores, 2, offset=5).tolist() == []
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+
+from recipe_index import InvertedIndex
+
+RECIPES = pd.DataFrame({
+    'tags_cleaned': [
+        "main-dish italian easy", "desserts cake", "side-dishes vegetarian", "main-dish mexican", "breakfast", None,
+    ],
+    'ingredients': [
+        ["eggs", "extra virgin olive oil", "tomatoes"],
+        ["peanuts", "sugar", "butter"],
+        ["olive", "vegetable oil", "walnut"],
+        ["egg", "Tomato paste", "chicken"],
+        ["egg whites", "almond milk"],
+        [],
+    ],
+})
+
+
+def baseline_filter(recipes, tags=(), included=(), excluded=()):
+    """The str.contains filters the index replaces."""
+    rows = recipes
+    for tag in tags:
+        rows = rows[rows['tags_cleaned'].str.contains(tag, case=False, na=False, regex=False)]
+    for ingredient in included:
+        rows = rows[rows['ingredients'].astype(str).str.contains(ingredient, case=False, na=False, regex=False)]
+    for ingredient in excluded:
+        rows = rows[~rows['ingredients'].apply(lambda x: ingredient.lower() in str(x).lower())]
+    return rows.index.tolist()
+
+
+@pytest.fixture(scope='module')
+def index():
+    return InvertedIndex.from_recipes(RECIPES)
+
+
+def test_excluding_a_singular_drops_plurals(index):
+    assert index.filter(excluded=['egg']).tolist() == [1, 2, 5]
+
+
+def test_excluding_a_substring_drops_every_ingredient_containing_it(index):
+    assert index.filter(excluded=['nut']).tolist() == [0, 3, 4, 5]
+
+
+def test_included_singular_matches_plural(index):
+    assert index.filter(included=['tomato']).tolist() == [0, 3]
+
+
+def test_multi_word_term_must_be_adjacent_within_one_ingredient(index):
+    assert index.filter(included=['olive oil']).tolist() == [0]
+    assert index.filter(included=['virgin olive']).tolist() == [0]
+    assert index.filter(included=['olive vegetable']).tolist() == []
+
+
+def test_terms_are_case_insensitive(index):
+    assert index.filter(tags=['Main-Dish'], included=['TOMATO']).tolist() == [0, 3]
+
+
+def test_empty_terms_are_ignored(index):
+    assert index.filter(tags=[''], included=['  ']).tolist() == list(range(len(RECIPES)))
+
+
+def test_unknown_term_matches_nothing(index):
+    assert index.filter(included=['saffron']).tolist() == []
+
+
+@pytest.mark.parametrize('tags, included, excluded', [
+    (['main'], [], []),
+    (['dish'], ['egg'], []),
+    ([], ['oil'], ['nut']),
+    ([], ['milk', 'egg'], []),
+    (['cake', 'dessert'], [], ['butter']),
+    ([], [], ['o']),
+])
+def test_matches_the_string_filters(index, tags, included, excluded):
+    assert index.filter(tags, included, excluded).tolist() == baseline_filter(RECIPES, tags, included, excluded)
+
+
+def test_saved_index_filters_like_the_built_one(index, tmp_path):
+    index.save(str(tmp_path))
+    loaded = InvertedIndex.load(str(tmp_path), len(RECIPES))
+    for tags, included, excluded in [(['dish'], ['egg'], []), ([], ['olive oil'], ['nut']), ([], [], ['o'])]:
+        assert loaded.filter(tags, included, excluded).tolist() == index.filter(tags, included, excluded).tolist()
+
+
+def test_load_without_saved_index_returns_none(tmp_path):
+    assert InvertedIndex.load(str(tmp_path), 0) is None
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from substitutions import BASE_SUBSTITUTIONS, COMMON_CONDITION_SETS, KEEP_INGREDIENTS, RecipeSubstitutions, \
+    SubstitutionEngine, condition_rules, get_substitution_engine
+
+
+@pytest.mark.parametrize('ingredient, expected', [
+    ("butter", "olive oil"),
+    ("unsalted butter", "olive oil"),
+    ("granulated white sugar", "honey"),
+    ("whole milk", "almond milk"),
+    ("heavy cream", "coconut cream"),
+    ("sour cream", "cottage cheese"),
+    ("eggs", "eggs"),
+])
+def test_base_rules_match_by_last_words(ingredient, expected):
+    assert get_substitution_engine().substitute_one(ingredient) == expected
+
+
+@pytest.mark.parametrize('ingredient', [
+    "peanut butter", "creamy peanut butter", "ice cream", "vanilla ice cream", "evaporated milk",
+    "sweetened condensed milk", "coconut milk", "rice flour", "almond milk", "coconut cream",
+])
+def test_keep_ingredients_are_unchanged(ingredient):
+    for conditions in ((), ("Diabetes",), ("Diabetes", "Heart Condition")):
+        assert get_substitution_engine(conditions).substitute_one(ingredient) == ingredient
+
+
+def test_every_keep_overrides_a_rule():
+    # A keep that shares no last word with a rule (or substitute) does nothing
+    rule_words = {phrase.split()[-1] for phrase in list(BASE_SUBSTITUTIONS) + list(BASE_SUBSTITUTIONS.values())}
+    assert [keep for keep in KEEP_INGREDIENTS if keep.split()[-1] not in rule_words] == []
+
+
+def test_condition_rules_layer_over_the_base_table():
+    engine = get_substitution_engine(("Diabetes",))
+
+    assert engine.substitute(["brown sugar", "rice", "honey", "salt"]) == [
+        "stevia", "cauliflower rice", "monk fruit sweetener", "herbs or potassium salt",
+    ]
+    assert get_substitution_engine(("Heart Condition",)).substitute_one("fried food") == "baked or grilled food"
+
+
+def test_substitutes_are_not_substituted_again():
+    engine = SubstitutionEngine(condition_rules(()))
+
+    assert engine.substitute_one("whole wheat flour") == "whole wheat flour"
+    assert engine.substitute_one("low-fat cheese") == "low-fat cheese"
+
+
+RECIPE_INGREDIENTS = [
+    ["unsalted butter", "eggs", "white sugar"],
+    [],
+    ["peanut butter", "honey", "rice", "whole milk"],
+    ["salt", "salt", "fried food"],
+]
+
+
+def test_recipe_substitutions_match_the_engine_for_every_common_set():
+    precomputed = RecipeSubstitutions(pd.Series(RECIPE_INGREDIENTS))
+    rows = [3, 0, 2, 1]
+    page = [RECIPE_INGREDIENTS[row] for row in rows]
+
+    for conditions in COMMON_CONDITION_SETS:
+        assert precomputed.substitute_page(rows, page, conditions) == \
+            get_substitution_engine(conditions).substitute_batch(page)
+
+
+def test_recipe_substitutions_store_only_changed_ingredients():
+    precomputed = RecipeSubstitutions(pd.Series(RECIPE_INGREDIENTS))
+    offsets, positions, _ = precomputed.changes[()]
+
+    assert offsets.tolist() == [0, 2, 2, 4, 7]
+    assert positions.tolist() == [0, 2, 2, 3, 0, 1, 2]
+
+
+def test_substitute_page_falls_back_to_the_engine_for_other_sets():
+    precomputed = RecipeSubstitutions(pd.Series(RECIPE_INGREDIENTS), condition_sets=[()])
+
+    assert precomputed.substitute_page([2], [RECIPE_INGREDIENTS[2]], ["Diabetes"]) == [
+        ["peanut butter", "monk fruit sweetener", "cauliflower rice", "almond milk"],
+    ]